@@ -56,12 +56,26 @@ def blueprint() -> Blueprint:
 
         limit = common_utils.int_arg(request, "limit")
         offset = common_utils.int_arg(request, "offset", 0)
+        # ID of the last response of the previous page
+        cursor = common_utils.int_arg(request, "cursor")
+        # only match responses whose text starts with the text query
+        match_text_prefix = common_utils.bool_arg(request, "prefix", False)
 
         responses, total_number = _nlg_service(request).fetch_responses(
-            text_query, response_query, fields, limit, offset
+            text_query,
+            response_query,
+            fields,
+            limit,
+            offset,
+            cursor=(None, cursor) if cursor is not None else None,
+            match_text_prefix=match_text_prefix,
         )
 
-        return response.json(responses, headers={"X-Total-Count": total_number})
+        headers = {"X-Total-Count": total_number}
+        if limit and len(responses) == limit and "id" in responses[-1]:
+            headers["X-Next-Cursor"] = responses[-1]["id"]
+
+        return response.json(responses, headers=headers)
 
     @nlg_endpoints.route("/templates", methods=["GET", "HEAD"])
     @rasa_x_scoped("responseTemplates.list", allow_api_token=True)
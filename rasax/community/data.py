@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import Text, List, Tuple, Set, Optional
 from pathlib import Path
 from enum import Enum, unique
@@ -56,6 +57,9 @@ def format_from_mime_type(
     raise ValueError(f"No matches for MIME type '{mime_type}'.")
 
 
+# stories are stored in a few files, and the format of the file is determined for
+# every story
+@lru_cache(maxsize=1024)
 def format_from_filename(filename: Text) -> FileFormat:
     """Returns a `FileFormat` given a file path.
 
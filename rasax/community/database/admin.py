@@ -1,5 +1,5 @@
 import json
-from typing import Any, Text, Dict, Union
+from typing import Any, Text, Dict, Union, Tuple, Optional
 
 import sqlalchemy as sa
 from sqlalchemy.orm import relationship
@@ -111,12 +111,24 @@ class Project(Base):
         for the yaml dump.
         """
 
-        _config = json.loads(self.config)
-        if "path" in _config:
-            del _config["path"]
+        _config, _ = self.get_model_config_and_path()
 
         return _config
 
+    def get_model_config_and_path(
+        self,
+    ) -> Tuple[Dict[Text, Union[Text, Dict]], Optional[Text]]:
+        """Return model config and the path it was loaded from.
+
+        Returns:
+            The model config without the `path` key, and the value of the `path` key.
+        """
+
+        _config = json.loads(self.config)
+        path = _config.pop("path", None)
+
+        return _config, path
+
 
 class Environment(Base):
     """Stores the different bot environments which are available.
@@ -135,10 +147,15 @@ class Environment(Base):
     token = sa.Column(sa.String)
 
     def as_dict(self) -> Dict[Text, Any]:
-        environment_dict = {self.name: {"url": self.url, "token": self.token}}
+        environment_dict = dict([self.as_key_value()])
 
         return environment_dict
 
+    def as_key_value(self) -> Tuple[Text, Dict[Text, Any]]:
+        """Return the environment name and its config."""
+
+        return self.name, {"url": self.url, "token": self.token}
+
 
 class PlatformFeature(Base):
     """Stores whether certain feature flags are activated."""
@@ -223,6 +223,9 @@ class MessageLog(Base):
     - `id` (Revision: `2a216ed121dd`)
     - `hash` (Revision: `af3596f6982f`)
     - `(archived, in_training_data)` (Revision: `af3596f6982f`)
+    - `to_tsvector('simple', text)` on PostgreSQL (Revision: `c5e2a8d41f07`)
+    - `(archived, in_training_data, id)` (Revision: `4f1b9c7e2d3a`)
+    - `(archived, time)` (Revision: `4f1b9c7e2d3a`)
     """
 
     __tablename__ = "message_log"
@@ -248,18 +251,52 @@ class MessageLog(Base):
     conversation = relationship("Conversation", back_populates="message_logs")
 
     def as_dict(self) -> Dict[Text, Any]:
+        return self.row_as_dict(self)
+
+    @staticmethod
+    def as_dict_columns() -> List[sa.Column]:
+        """Get the columns which are required to serialize a message log.
+
+        Returns:
+            The columns which need to be selected to call `row_as_dict` on the rows.
+        """
+        return [
+            MessageLog.id,
+            MessageLog.time,
+            MessageLog.model,
+            MessageLog.hash,
+            MessageLog.conversation_id,
+            MessageLog.event_id,
+            MessageLog.text,
+            MessageLog.intent,
+            MessageLog.confidence,
+            MessageLog.intent_ranking,
+            MessageLog.entities,
+        ]
+
+    @staticmethod
+    def row_as_dict(row: Any) -> Dict[Text, Any]:
+        """Serialize a message log.
+
+        Args:
+            row: A `MessageLog` object or a query result row which contains the
+                columns from `as_dict_columns`.
+
+        Returns:
+            The message log as dictionary.
+        """
         return {
-            "id": self.id,
-            "time": self.time,
-            "model": self.model,
-            "hash": self.hash,
-            "conversation_id": self.conversation_id,
-            "event_id": self.event_id,
+            "id": row.id,
+            "time": row.time,
+            "model": row.model,
+            "hash": row.hash,
+            "conversation_id": row.conversation_id,
+            "event_id": row.event_id,
             "user_input": {
-                "text": self.text,
-                "intent": {"name": self.intent, "confidence": self.confidence},
-                "intent_ranking": json.loads(self.intent_ranking),
-                "entities": json.loads(self.entities),
+                "text": row.text,
+                "intent": {"name": row.intent, "confidence": row.confidence},
+                "intent_ranking": json.loads(row.intent_ranking),
+                "entities": json.loads(row.entities),
             },
         }
 
@@ -1,11 +1,11 @@
 import json
 import os
 from pathlib import Path
-from typing import Dict, Text, Any, Optional
+from typing import Dict, Text, Any, Optional, List
 
 import sqlalchemy as sa
 from sqlalchemy import Column
-from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.orm import relationship, deferred, validates
 
 import rasax.community.constants as constants
 import rasax.community.config as rasa_x_config
@@ -27,13 +27,21 @@ RESPONSE_ANNOTATION_KEYS = {
 
 
 class Response(Base):
-    """Stores the responses."""
+    """Stores the responses.
+
+    Indexed columns:
+    - `hash` (Revision: `8a8562256a8e`)
+    - `text` using `pg_trgm` on PostgreSQL (Revision: `9b3d6f1a8c24`)
+    - `text_lower` (Revision: `e7c4a2b95d13`)
+    """
 
     __tablename__ = "response"
 
     id = sa.Column(sa.Integer, utils.create_sequence(__tablename__), primary_key=True)
     response_name = sa.Column(sa.String, nullable=False)
     text = sa.Column(sa.Text)
+    # lowercase version of `text` which is kept in sync by `_update_text_lower`
+    text_lower = sa.Column(sa.Text)
     content = sa.Column(sa.Text)
     annotator_id = sa.Column(sa.String, sa.ForeignKey("rasa_x_user.username"))
     annotated_at = sa.Column(sa.Float)  # annotation time as unix timestamp
@@ -44,6 +52,11 @@ class Response(Base):
     domain = relationship("Domain", back_populates="responses")
     domain_id = sa.Column(sa.Integer, sa.ForeignKey("domain.id"))
 
+    @validates("text")
+    def _update_text_lower(self, _: Text, text: Optional[Text]) -> Optional[Text]:
+        self.text_lower = text.lower() if text else text
+        return text
+
     def as_dict(self) -> Dict[Text, Any]:
         result = json.loads(self.content)
         result[constants.RESPONSE_NAME_KEY] = self.response_name
@@ -84,13 +97,43 @@ class Story(Base):
     is_rule = sa.Column(sa.Boolean, default=False)
 
     def as_dict(self) -> Dict[Text, Any]:
+        return self.row_as_dict(self)
+
+    @staticmethod
+    def as_dict_columns() -> List[sa.Column]:
+        """Get the columns which are required to serialize a story.
+
+        Returns:
+            The columns which need to be selected to call `row_as_dict` on the rows.
+        """
+        return [
+            Story.id,
+            Story.name,
+            Story.story,
+            Story.user,
+            Story.annotated_at,
+            Story.filename,
+            Story.is_rule,
+        ]
+
+    @staticmethod
+    def row_as_dict(row: Any) -> Dict[Text, Any]:
+        """Serialize a story.
+
+        Args:
+            row: A `Story` object or a query result row which contains the columns
+                from `as_dict_columns`.
+
+        Returns:
+            The story as dictionary.
+        """
         return {
-            "id": self.id,
-            "name": self.name,
-            "story": self.story,
-            "annotation": {"user": self.user, "time": self.annotated_at},
-            "filename": self.filename,
-            "is_rule": bool(self.is_rule),
+            "id": row.id,
+            "name": row.name,
+            "story": row.story,
+            "annotation": {"user": row.user, "time": row.annotated_at},
+            "filename": row.filename,
+            "is_rule": bool(row.is_rule),
         }
 
 
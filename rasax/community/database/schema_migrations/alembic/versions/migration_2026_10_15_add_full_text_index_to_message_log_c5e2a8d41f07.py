@@ -0,0 +1,43 @@
+"""Add full-text index to the `text` column of the message logs.
+
+Reason:
+Text searches on the NLU logs used a `LIKE '%<query>%'` filter which cannot use
+an index. On PostgreSQL a GIN index on the `tsvector` of the text is added so that
+the search can be done using the full-text search instead. Other databases keep
+using `LIKE` queries and hence don't get a new index.
+
+Revision ID: c5e2a8d41f07
+Revises: 6af361a57ca6
+
+"""
+from alembic import op
+import rasax.community.database.schema_migrations.alembic.utils as migration_utils
+
+# revision identifiers, used by Alembic.
+revision = "c5e2a8d41f07"
+down_revision = "6af361a57ca6"
+branch_labels = None
+depends_on = None
+
+TABLE = "message_log"
+INDEX_NAME = "message_log_idx_text_tsvector"
+POSTGRESQL_DIALECT = "postgresql"
+
+
+def upgrade():
+    if not migration_utils.using_dialect(POSTGRESQL_DIALECT):
+        return
+
+    # Expression indexes can't be reflected by SQLAlchemy, hence `IF NOT EXISTS`
+    # instead of `migration_utils.index_exists`
+    op.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON {TABLE} "
+        f"USING gin (to_tsvector('simple', text))"
+    )
+
+
+def downgrade():
+    if not migration_utils.using_dialect(POSTGRESQL_DIALECT):
+        return
+
+    op.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
@@ -0,0 +1,47 @@
+"""Add indexes which cover the filtering and sorting of NLU logs queries.
+
+Reason:
+The NLU inbox filters logs by `archived` (and optionally `in_training_data`) and
+sorts them by `id` (default) or `time`. With an index only on the filter columns
+the database has to sort all matching rows before it can apply the pagination.
+Composite indexes which end with the sort column let the database read the
+requested page directly in index order.
+
+Revision ID: 4f1b9c7e2d3a
+Revises: c5e2a8d41f07
+
+"""
+from alembic import op
+import rasax.community.database.schema_migrations.alembic.utils as migration_utils
+
+# revision identifiers, used by Alembic.
+revision = "4f1b9c7e2d3a"
+down_revision = "c5e2a8d41f07"
+branch_labels = None
+depends_on = None
+
+TABLE_NAME = "message_log"
+
+# Index to speed up querying suggestions sorted by `id`
+SUGGESTION_ID_INDEX_NAME = "message_log_suggestion_id_idx"
+# Index to speed up querying logs sorted by `time`
+ARCHIVED_TIME_INDEX_NAME = "message_log_archived_time_idx"
+
+INDEXES = {
+    SUGGESTION_ID_INDEX_NAME: ["archived", "in_training_data", "id"],
+    ARCHIVED_TIME_INDEX_NAME: ["archived", "time"],
+}
+
+
+def upgrade():
+    for index_name, columns in INDEXES.items():
+        if not migration_utils.index_exists(TABLE_NAME, index_name):
+            with op.batch_alter_table(TABLE_NAME) as batch_op:
+                batch_op.create_index(index_name, columns)
+
+
+def downgrade():
+    for index_name in INDEXES:
+        if migration_utils.index_exists(TABLE_NAME, index_name):
+            with op.batch_alter_table(TABLE_NAME) as batch_op:
+                batch_op.drop_index(index_name)
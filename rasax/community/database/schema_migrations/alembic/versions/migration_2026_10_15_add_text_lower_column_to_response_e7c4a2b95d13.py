@@ -0,0 +1,90 @@
+"""Add `text_lower` column and an index for it to `response` table.
+
+Reason:
+Searching responses by the beginning of their text is case insensitive. Filtering
+on `lower(text)` can't use an index on `text`. Storing the lowercase text in a
+separate, indexed column allows prefix searches (`LIKE '<query>%'`) to use a
+B-tree index.
+
+Existing rows are filled using the database's `lower` function in a single
+`UPDATE`. Note that e.g. SQLite's `lower` only handles ASCII characters, so
+non-ASCII characters of existing responses keep their case there. New and updated
+responses are lowercased by Rasa X itself.
+
+Revision ID: e7c4a2b95d13
+Revises: 9b3d6f1a8c24
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+import rasax.community.database.schema_migrations.alembic.utils as migration_utils
+
+
+# revision identifiers, used by Alembic.
+revision = "e7c4a2b95d13"
+down_revision = "9b3d6f1a8c24"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger(__name__)
+
+TABLE_NAME = "response"
+COLUMN_NAME = "text_lower"
+NEW_INDEX_NAME = "response_text_lower_idx"
+SQLITE_DIALECT = "sqlite"
+
+
+def upgrade():
+    if not migration_utils.table_has_column(TABLE_NAME, COLUMN_NAME):
+        migration_utils.create_column(TABLE_NAME, sa.Column(COLUMN_NAME, sa.Text()))
+
+    logger.debug(
+        "The lowercase text of all responses will be computed. Depending on "
+        "the number of responses in your database this might take a while."
+    )
+    op.execute(f"UPDATE {TABLE_NAME} SET {COLUMN_NAME} = lower(text)")
+
+    if not migration_utils.index_exists(TABLE_NAME, NEW_INDEX_NAME):
+        create_text_lower_index()
+
+
+def create_text_lower_index() -> None:
+    if migration_utils.using_dialect(SQLITE_DIALECT):
+        # SQLite supports indexes on `TEXT` columns. Savepoints are not used here
+        # since they don't work reliably with the `pysqlite` driver.
+        _create_text_lower_index()
+        return
+
+    bind = op.get_bind()
+    try:
+        # Use a savepoint so that a failure doesn't abort the whole transaction
+        with bind.begin_nested():
+            _create_text_lower_index()
+    except sa.exc.DBAPIError as e:
+        # Some databases (e.g. Oracle) don't support `sa.Text()` columns as part of
+        # indexes. In that case prefix searches fall back to full table scans.
+        logger.warning(
+            f"Could not create the index '{NEW_INDEX_NAME}'. Searching responses "
+            f"by the beginning of their text will not use an index. Error: {e}"
+        )
+
+
+def _create_text_lower_index() -> None:
+    # `text_pattern_ops` allows PostgreSQL to use the index for `LIKE` queries
+    # regardless of the database's collation
+    op.create_index(
+        NEW_INDEX_NAME,
+        TABLE_NAME,
+        [COLUMN_NAME],
+        postgresql_ops={COLUMN_NAME: "text_pattern_ops"},
+    )
+
+
+def downgrade():
+    if migration_utils.index_exists(TABLE_NAME, NEW_INDEX_NAME):
+        op.drop_index(NEW_INDEX_NAME, table_name=TABLE_NAME)
+
+    migration_utils.drop_column(TABLE_NAME, COLUMN_NAME)
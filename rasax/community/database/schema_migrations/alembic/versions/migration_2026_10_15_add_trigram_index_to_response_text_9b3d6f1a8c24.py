@@ -0,0 +1,64 @@
+"""Add a trigram index to the `text` column of the responses.
+
+Reason:
+Responses are searched using `ILIKE '%<query>%'` filters. A leading wildcard
+prevents the usage of B-tree indexes, so every search was a full table scan. On
+PostgreSQL a GIN index using the `pg_trgm` operator class can be used for these
+queries instead. Other databases don't support these indexes and are skipped.
+
+Creating the `pg_trgm` extension requires the respective privileges. If the
+extension can't be created, the index is skipped and searches fall back to
+sequential scans.
+
+Revision ID: 9b3d6f1a8c24
+Revises: 4f1b9c7e2d3a
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+import rasax.community.database.schema_migrations.alembic.utils as migration_utils
+
+# revision identifiers, used by Alembic.
+revision = "9b3d6f1a8c24"
+down_revision = "4f1b9c7e2d3a"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger(__name__)
+
+TABLE = "response"
+INDEX_NAME = "response_text_trgm_idx"
+POSTGRESQL_DIALECT = "postgresql"
+
+
+def upgrade():
+    if not migration_utils.using_dialect(POSTGRESQL_DIALECT):
+        return
+
+    bind = op.get_bind()
+    try:
+        # Use a savepoint so that a failure doesn't abort the whole transaction
+        with bind.begin_nested():
+            bind.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except sa.exc.DBAPIError as e:
+        logger.warning(
+            f"Could not create the PostgreSQL extension 'pg_trgm'. Searching "
+            f"responses by text will not use an index. Error: {e}"
+        )
+        return
+
+    # Expression and operator class indexes can't be reflected by SQLAlchemy,
+    # hence `IF NOT EXISTS` instead of `migration_utils.index_exists`
+    op.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON {TABLE} "
+        f"USING gin (text gin_trgm_ops)"
+    )
+
+
+def downgrade():
+    if not migration_utils.using_dialect(POSTGRESQL_DIALECT):
+        return
+
+    op.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
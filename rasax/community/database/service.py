@@ -1,4 +1,4 @@
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Text, Dict
 
 from sanic.request import Request
 from sqlalchemy.ext.declarative import DeclarativeMeta
@@ -47,6 +47,13 @@ class DbService:
 
         self.session.bulk_save_objects(objects)
 
+    def bulk_insert_mappings(
+        self, mapper: DeclarativeMeta, mappings: List[Dict[Text, Any]]
+    ) -> None:
+        """Performs a bulk insert of `mappings` for `mapper`."""
+
+        self.session.bulk_insert_mappings(mapper, mappings)
+
     def merge(self, instance: Base) -> None:
         """Perform a merge of `instance` within the current `session`."""
 
@@ -80,6 +87,34 @@ class DbService:
         """
         return self.session.execute(expression)
 
+    def using_dialect(self, dialect: Text) -> bool:
+        """Determine whether the session is bound to a database of type `dialect`.
+
+        Args:
+            dialect: SQL dialect, e.g. 'postgresql'.
+
+        Returns:
+            `True` if the current dialect is `dialect`.
+        """
+        return self.session.bind.dialect.name == dialect
+
+    def supports_window_functions(self) -> bool:
+        """Determine whether the database supports window functions, e.g.
+        `COUNT(*) OVER ()`.
+
+        SQLite only supports window functions from version 3.25 on, and the version
+        depends on the system the Python interpreter links against.
+
+        Returns:
+            `True` if window functions can be used.
+        """
+        dialect = self.session.bind.dialect
+        if dialect.name != "sqlite":
+            return True
+
+        sqlite_version = getattr(dialect.dbapi, "sqlite_version_info", None)
+        return sqlite_version is not None and sqlite_version >= (3, 25)
+
     @staticmethod
     def from_request(request: Request, other_service: "DbService") -> "DbService":
         """Constructs Service object from the incoming request"""
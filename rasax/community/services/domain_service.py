@@ -886,34 +886,39 @@ def _create_responses_from_domain_dict(
         The created responses objects which now can be added to the database.
     """
     responses = domain.get("responses", domain.get("templates", {}))
+    annotated_at = time.time()
+
+    created_responses = []
+    for response_name, response_as_list in responses.items():
+        stripped_response_name = response_name.strip() if response_name else None
+        for response in response_as_list:
+            # serialize each response only once and reuse it for the hash
+            content = json.dumps(response, sort_keys=True)
+            created_responses.append(
+                Response(
+                    response_name=stripped_response_name,
+                    content=content,
+                    text=response["text"].strip() if response.get("text") else None,
+                    annotator_id=username,
+                    annotated_at=annotated_at,
+                    project_id=project_id,
+                    edited_since_last_training=have_responses_been_edited,
+                    hash=common_utils.get_uncached_text_hash(content),
+                )
+            )
 
-    return [
-        Response(
-            response_name=response_name.strip() if response_name else None,
-            content=json.dumps(response, sort_keys=True),
-            text=response["text"].strip() if response.get("text") else None,
-            annotator_id=username,
-            annotated_at=time.time(),
-            project_id=project_id,
-            edited_since_last_training=have_responses_been_edited,
-            hash=common_utils.get_text_hash(json.dumps(response, sort_keys=True)),
-        )
-        for response_name, response_as_list in responses.items()
-        for response in response_as_list
-    ]
+    return created_responses
 
 
 def _unique_responses(responses: List[Response]) -> List[Response]:
     """Remove duplicates from the list of responses and return a new list"""
 
     # We don't use __eq__ or __hash__ here because Response objects are
-    # actually different
-    unique_responses = set()
-    new_responses = []
+    # actually different. The response hash only covers the content, so the
+    # project and name have to be part of the fingerprint as well.
+    unique_responses = {}
     for r in responses:
-        fingerprint = (r.project_id, r.response_name, r.hash)
-        if fingerprint not in unique_responses:
-            new_responses.append(r)
-            unique_responses.add(fingerprint)
+        unique_responses.setdefault((r.project_id, r.response_name, r.hash), r)
 
-    return new_responses
+    # dicts preserve insertion order, so the first occurrence of each response wins
+    return list(unique_responses.values())
@@ -2,8 +2,6 @@ import logging
 import typing
 from typing import Any, Text, List, Optional, Union, Dict
 
-import time
-
 import rasax.community.config as rasa_x_config
 from rasax.community.services.event_consumers.event_consumer import EventConsumer
 
@@ -14,6 +12,9 @@ if typing.TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# Maximum time a single poll waits for new records
+POLL_TIMEOUT_IN_MILLISECONDS = 1000
+
 
 class KafkaEventConsumer(EventConsumer):
     type_name = "kafka"
@@ -171,13 +172,13 @@ class KafkaEventConsumer(EventConsumer):
         self._create_consumer()
         logger.info(f"Start consuming topic '{self.topic}' on Kafka url '{self.url}'.")
         while True:
+            # Block until records are available (or the timeout is reached) instead
+            # of repeatedly polling and sleeping in between
             records: Dict[
                 "TopicPartition", List["ConsumerRecord"]
-            ] = self.consumer.poll()
+            ] = self.consumer.poll(timeout_ms=POLL_TIMEOUT_IN_MILLISECONDS)
 
             # records contain only one topic, so we can just get all values
             for messages in records.values():
                 for message in messages:
                     self.log_event(message.value)
-
-            time.sleep(0.01)
@@ -1,9 +1,10 @@
 import asyncio  # pytype: disable=pyi-error
 import json
 import logging
+import re
 import time
 from pathlib import Path
-from typing import Dict, Text, Any, Optional, List, Tuple, Union
+from typing import Dict, Text, Any, Optional, List, Tuple, Union, Callable
 
 from sanic.request import Request
 
@@ -11,21 +12,39 @@ from rasa.shared.constants import INTENT_MESSAGE_PREFIX
 from rasa.shared.core.events import UserUttered, Event
 import sqlalchemy as sa
 from sqlalchemy import or_, false
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext import baked
 
 import rasax.community.config as rasa_x_config
 import rasax.community.utils.common as common_utils
 import rasax.community.constants as constants
 from rasax.community.database.conversation import MessageLog
+from rasax.community.database.data import TrainingData
 from rasax.community.database.service import DbService
 from rasax.community.services.model_service import ModelService
 from rasax.community.services.settings_service import SettingsService
 
 logger = logging.getLogger(__name__)
 
+POSTGRESQL_DIALECT = "postgresql"
+# has to match the configuration used for the full-text index on `message_log.text`
+FULL_TEXT_SEARCH_CONFIG = "simple"
+
+# the model which is associated with new message logs changes rarely compared to the
+# rate of incoming messages, hence it's fine to cache it for a short time
+MODEL_NAME_CACHE_TTL_IN_SECONDS = 5
+
+# Caches the construction and SQL compilation of frequently executed queries
+bakery = baked.bakery()
+
 
 class LogsService(DbService):
     """Service to deal with parsed user messages."""
 
+    # Maps the name of the model lookup method and the project ID to the time of the
+    # lookup and the found model name
+    _model_name_cache: Dict[Tuple[Text, Text], Tuple[float, Optional[Text]]] = {}
+
     def fetch_logs(
         self,
         text_query: Optional[Text] = None,
@@ -63,17 +82,16 @@ class LogsService(DbService):
             The filtered matching rows and the number of total matching rows.
         """
         # returns logs, sorts it in reverse-chronological order
-        intents = intent_query.split(",") if intent_query else []
         query = True
 
         if text_query and intent_query:
             query = or_(
-                MessageLog.text.like(f"%{text_query}%"), MessageLog.intent.in_(intents)
+                self._text_filter(text_query), self._intent_filter(intent_query)
             )
         elif text_query:
-            query = MessageLog.text.like(f"%{text_query}%")
+            query = self._text_filter(text_query)
         elif intent_query:
-            query = MessageLog.intent.in_(intents)
+            query = self._intent_filter(intent_query)
 
         columns = common_utils.get_columns_from_fields(fields_query)
         # map `name` field to `intent`
@@ -89,19 +107,28 @@ class LogsService(DbService):
         if sort_column is None:
             raise ValueError(f"Invalid column '{sort_by}' for MessageLog.")
 
-        query_selectors = common_utils.get_query_selectors(MessageLog, columns)
-
-        logs = (
-            self.query(*query_selectors)
-            .filter(query)
-            .filter(MessageLog.archived == false())
-        )
+        if columns:
+            query_selectors = common_utils.get_query_selectors(MessageLog, columns)
+        else:
+            # Only select the serialized columns instead of loading `MessageLog`
+            # objects, which are expensive to create and are not modified anyway
+            query_selectors = MessageLog.as_dict_columns()
 
+        filters = [query, MessageLog.archived == false()]
         if exclude_training_data:
-            logs = logs.filter(MessageLog.in_training_data == false())
+            filters.append(MessageLog.in_training_data == false())
 
-        # Get the total count before applying `sort`
-        total_number_logs = logs.count()
+        # Compute the total count as part of the same query using a window
+        # function. The window is evaluated before `offset` / `limit` are applied,
+        # so each row carries the number of all matching rows. Otherwise the total
+        # is counted in a separate query.
+        count_in_window = self.supports_window_functions()
+        if count_in_window:
+            query_selectors = list(query_selectors) + [
+                sa.func.count().over().label("_total")
+            ]
+
+        logs = self.query(*query_selectors).filter(*filters)
 
         # Only order by selected column if it was selected (empty `columns`
         # implies all columns were selected)
@@ -110,15 +137,76 @@ class LogsService(DbService):
                 sort_column.desc() if sort_order == "desc" else sort_column.asc()
             )
 
-        logs = logs.offset(offset).limit(limit).all()
+        rows = logs.offset(offset).limit(limit).all()
+
+        if count_in_window and rows:
+            total_number_logs = rows[0][-1]
+            # strip the `_total` column again
+            rows = [r[:-1] for r in rows] if columns else rows
+        elif count_in_window and not (offset or limit == 0):
+            total_number_logs = 0
+        else:
+            # the window count is not available, or the page is empty but there
+            # might still be matching rows outside of it
+            total_number_logs = self.query(MessageLog).filter(*filters).count()
 
         if columns:
-            results = [common_utils.query_result_to_dict(r, fields_query) for r in logs]
+            results = [common_utils.query_result_to_dict(r, fields_query) for r in rows]
         else:
-            results = [t.as_dict() for t in logs]
+            results = [MessageLog.row_as_dict(r) for r in rows]
 
         return common_utils.QueryResult(results, total_number_logs)
 
+    def _text_filter(self, text_query: Text) -> sa.sql.ClauseElement:
+        """Create the filter expression for a text search on the message logs.
+
+        PostgreSQL databases use the full-text index on the `text` column
+        (Revision: `c5e2a8d41f07`). Every word of the query is matched as a prefix
+        so that partial words still find messages, similar to the `LIKE` query
+        which other databases fall back to.
+
+        Args:
+            text_query: Text which the logs should be filtered by.
+
+        Returns:
+            The filter expression.
+        """
+        # drop punctuation, which is either an operator in `tsquery` expressions or
+        # ignored by the full-text parser anyway
+        terms = re.findall(r"\w+", text_query)
+
+        if self.using_dialect(POSTGRESQL_DIALECT) and terms:
+            document = sa.func.to_tsvector(FULL_TEXT_SEARCH_CONFIG, MessageLog.text)
+            search = sa.func.to_tsquery(
+                FULL_TEXT_SEARCH_CONFIG, " & ".join(f"{term}:*" for term in terms)
+            )
+            return document.op("@@")(search)
+
+        return MessageLog.text.like(f"%{text_query}%")
+
+    def _intent_filter(self, intent_query: Text) -> sa.sql.ClauseElement:
+        """Create the filter expression for logs matching at least one intent.
+
+        On PostgreSQL the intents are passed as a single array parameter. This keeps
+        the SQL statement the same regardless of the number of intents, which allows
+        the database to reuse its query plans. Other databases use an `IN` clause.
+
+        Args:
+            intent_query: Intents separated by `,`.
+
+        Returns:
+            The filter expression.
+        """
+        intents = intent_query.split(",")
+
+        if self.using_dialect(POSTGRESQL_DIALECT):
+            intents_parameter = sa.bindparam(
+                "intents", intents, type_=postgresql.ARRAY(sa.String)
+            )
+            return MessageLog.intent == sa.any_(intents_parameter)
+
+        return MessageLog.intent.in_(intents)
+
     def archive(self, log_id: int) -> bool:
         """Mark a message log as archived.
 
@@ -136,7 +224,10 @@ class LogsService(DbService):
         return log is not None
 
     def _get_log_by_id(self, log_id: int) -> Optional[MessageLog]:
-        return self.query(MessageLog).filter(MessageLog.id == log_id).first()
+        query = bakery(lambda session: session.query(MessageLog))
+        query += lambda q: q.filter(MessageLog.id == sa.bindparam("log_id"))
+
+        return query(self.session).params(log_id=log_id).first()
 
     def get_log_by_hash(self, _hash: Text) -> Optional[MessageLog]:
         """Get a log by its hashed text.
@@ -147,7 +238,10 @@ class LogsService(DbService):
         Returns:
             A matching message log or `None` if no log matched.
         """
-        return self.query(MessageLog).filter(MessageLog.hash == _hash).first()
+        query = bakery(lambda session: session.query(MessageLog))
+        query += lambda q: q.filter(MessageLog.hash == sa.bindparam("hash"))
+
+        return query(self.session).params(hash=_hash).first()
 
     def replace_log(
         self,
@@ -196,7 +290,8 @@ class LogsService(DbService):
         else:
             self._insert_new_log(log, project_id)
 
-        logger.debug(f"Saving to NLU logs:\n{log}")
+        # lazy formatting, so the log is only formatted if debug logging is enabled
+        logger.debug("Saving to NLU logs:\n%s", log)
 
         return log.as_dict()
 
@@ -210,16 +305,33 @@ class LogsService(DbService):
         # flush so id gets assigned
         self.flush()
 
+    @staticmethod
     def _is_log_with_hash_in_training_data(
-        self, log: MessageLog, project_id: Text
-    ) -> bool:
-        from rasax.community.services.data_service import DataService
+        log: MessageLog, project_id: Text
+    ) -> Union[bool, sa.sql.ClauseElement]:
+        """Determine whether the text of `log` is part of the training data.
 
-        data_service = DataService(self.session)
-        return (
-            log.text.startswith(INTENT_MESSAGE_PREFIX)
-            or data_service.get_example_by_hash(project_id, log.hash) is not None
+        Unless the log is an intent message, the check is returned as SQL expression.
+        Assigned to `MessageLog.in_training_data`, it is evaluated as part of the
+        `INSERT` statement of the log instead of requiring a separate query.
+
+        Args:
+            log: The message log which is about to be inserted.
+            project_id: Project ID of the training data.
+
+        Returns:
+            `True` if the log is an intent message, otherwise an expression which
+            checks if there is a training example with the same hash.
+        """
+        if log.text and log.text.startswith(INTENT_MESSAGE_PREFIX):
+            return True
+
+        is_training_example = sa.exists().where(
+            sa.and_(
+                TrainingData.project_id == project_id, TrainingData.hash == log.hash
+            )
         )
+        return sa.case([(is_training_example, True)], else_=False)
 
     @staticmethod
     def _model_from_parse_data(parse_data: Dict[Text, Any]) -> Optional[Text]:
@@ -293,7 +405,7 @@ class LogsService(DbService):
 
         # we do not want to hold up the creation of the log, so
         # pass a very short timeout
-        status = common_utils.run_in_loop(
+        status = common_utils.run_in_thread_loop(
             stack_service.server_status(timeout_in_seconds=timeout_in_seconds)
         )
         if not status:
@@ -327,12 +439,40 @@ class LogsService(DbService):
         """
         return (
             self._model_from_parse_data(parse_data)
-            or self._get_currently_active_model(project_id)
-            or self._get_loaded_model(project_id)
-            or self._get_latest_model(project_id)
+            or self._get_cached_model_name(project_id, self._get_currently_active_model)
+            or self._get_cached_model_name(project_id, self._get_loaded_model)
+            or self._get_cached_model_name(project_id, self._get_latest_model)
             or constants.UNAVAILABLE_MODEL_NAME
         )
 
+    def _get_cached_model_name(
+        self, project_id: Text, get_model_name: Callable[[Text], Optional[Text]]
+    ) -> Optional[Text]:
+        """Return the result of a model lookup which is cached for a short time.
+
+        This avoids database queries and HTTP requests to the Rasa production
+        service for every single message log.
+
+        Args:
+            project_id: Name of the project.
+            get_model_name: Method which looks up the model name for a project.
+
+        Returns:
+            The cached model name if the cached value is recent enough, otherwise the
+            result of `get_model_name`.
+        """
+        key = (get_model_name.__name__, project_id)
+        now = time.time()
+
+        cached = self._model_name_cache.get(key)
+        if cached and now - cached[0] < MODEL_NAME_CACHE_TTL_IN_SECONDS:
+            return cached[1]
+
+        model_name = get_model_name(project_id)
+        self._model_name_cache[key] = (now, model_name)
+
+        return model_name
+
     def _create_log(
         self,
         parse_data: Dict[Text, Any],
@@ -426,27 +566,19 @@ class LogsService(DbService):
             message_log = MessageLog.__table__
 
         if training_data is None:
-            from rasax.community.database import TrainingData
-
             # noinspection PyUnresolvedReferences
             training_data = TrainingData.__table__
 
-        # Nuke all `in_training_data` values
-        query = sa.update(message_log).values(in_training_data=False)
-        self.execute(query)
-
-        # Update logs which are in the training data
-        # This isn't done in single query since Oracle doesn't accept an `IN` clause
-        # as part of a `SET` subquery.
-        query = (
-            sa.update(message_log)
-            .values(in_training_data=True)
-            .where(
-                sa.or_(
-                    message_log.c.hash.in_(sa.select([training_data.c.hash])),
-                    message_log.c.text.like(f"{INTENT_MESSAGE_PREFIX}%"),
-                )
-            )
+        # Set the `in_training_data` flag of every log in a single pass, so that each
+        # row is only written once.
+        # A correlated `EXISTS` is used instead of an `IN` clause since Oracle doesn't
+        # accept an `IN` clause as part of a `SET` subquery.
+        is_in_training_data = sa.or_(
+            sa.exists().where(training_data.c.hash == message_log.c.hash),
+            message_log.c.text.like(f"{INTENT_MESSAGE_PREFIX}%"),
+        )
+        query = sa.update(message_log).values(
+            in_training_data=sa.case([(is_in_training_data, True)], else_=False)
         )
 
         self.execute(query)
@@ -1,10 +1,13 @@
 import itertools
 import json
 import logging
+import operator
 import time
 from typing import Text, List, Dict, Any, Optional, Tuple, Set, NamedTuple
 
-from sqlalchemy import or_, and_, true, false
+import sqlalchemy as sa
+from sqlalchemy import or_, and_, true, false, func
+from sqlalchemy.sql import ColumnElement
 
 import rasax.community.constants as constants
 import rasax.community.config as rasa_x_config
@@ -16,6 +19,11 @@ from rasax.community.database.service import DbService
 
 logger = logging.getLogger(__name__)
 
+POSTGRESQL_DIALECT = "postgresql"
+
+# number of rows which are loaded at once when fetching responses without a limit
+RESPONSES_BATCH_SIZE = 500
+
 
 def _fix_response_name_key(response: Dict[Text, Any]) -> None:
     if "template" in response:
@@ -35,12 +43,102 @@ class HashedResponse(NamedTuple):
 
 
 def _get_hashed_response(response: Dict[Text, Any]) -> HashedResponse:
+    # The serialization has to stay the same since the hashes of the existing
+    # responses have been computed from it.
     response_content = json.dumps(response, sort_keys=True)
-    content_hash = common_utils.get_text_hash(response_content)
+    # each response is only hashed when it's written, so caching the hash would just
+    # keep the serialized content in memory
+    content_hash = common_utils.get_uncached_text_hash(response_content.encode())
 
     return HashedResponse(response_content=response_content, content_hash=content_hash)
 
 
+def _responses_after_cursor(
+    cursor: Tuple[Optional[Text], int], sort_by_response_name: bool
+) -> ColumnElement:
+    """Create a filter which selects the responses following the `cursor`.
+
+    Args:
+        cursor: Response name and ID of the last response of the previous page.
+        sort_by_response_name: `True` if the responses are sorted by their name and
+            ID, `False` if they are only sorted by ID.
+
+    Returns:
+        The filter expression.
+    """
+    response_name, _id = cursor
+
+    if not sort_by_response_name:
+        return Response.id > _id
+
+    return or_(
+        Response.response_name > response_name,
+        and_(Response.response_name == response_name, Response.id > _id),
+    )
+
+
+def _create_response(
+    response: Dict[Text, Any],
+    username: Optional[Text],
+    domain_id: Optional[int],
+    project_id: Text,
+) -> Response:
+    """Validate a response and create a new `Response` object from it.
+
+    Args:
+        response: Response object to create.
+        username: Username performing the operation.
+        domain_id: Domain associated with the response.
+        project_id: Project ID associated with the response.
+
+    Raises:
+        `ValueError` if no domain ID is specified.
+        `AttributeError` if the response name does not start with
+        `rasa.shared.constants.UTTER_PREFIX`.
+
+    Returns:
+        The new response object which was not added to the database yet.
+    """
+    response = response.copy()
+
+    if domain_id is None:
+        raise ValueError("Response could not be saved since domain ID is `None`.")
+
+    _fix_response_name_key(response)
+
+    response_name = Response.get_stripped_value(response, constants.RESPONSE_NAME_KEY)
+
+    if not response_name or not response_name.startswith(UTTER_PREFIX):
+        raise AttributeError(
+            f"Failed to save response. Response '{response_name}' does "
+            f"not begin with '{UTTER_PREFIX}' prefix."
+        )
+
+    response[constants.RESPONSE_NAME_KEY] = response_name
+    response["text"] = Response.get_stripped_value(response, "text")
+
+    hashed_response = _get_hashed_response(response)
+
+    new_response = Response(
+        response_name=response[constants.RESPONSE_NAME_KEY],
+        text=response["text"],
+        content=hashed_response.response_content,
+        annotated_at=time.time(),
+        annotator_id=username or rasa_x_config.default_username,
+        project_id=project_id,
+        hash=hashed_response.content_hash,
+    )
+
+    if domain_id:
+        new_response.domain_id = domain_id
+
+    return new_response
+
+
+def _response_hash_filter(project_id: Text, content_hash: Text) -> ColumnElement:
+    return and_(Response.project_id == project_id, Response.hash == content_hash)
+
+
 class NlgService(DbService):
     def save_response(
         self,
@@ -66,51 +164,15 @@ class NlgService(DbService):
         Returns:
             The saved response object.
         """
-        response = response.copy()
-
-        if domain_id is None:
-            raise ValueError("Response could not be saved since domain ID is `None`.")
-
-        _fix_response_name_key(response)
-
-        response_name = Response.get_stripped_value(
-            response, constants.RESPONSE_NAME_KEY
-        )
+        new_response = _create_response(response, username, domain_id, project_id)
 
-        if not response_name or not response_name.startswith(UTTER_PREFIX):
-            raise AttributeError(
-                f"Failed to save response. Response '{response_name}' does "
-                f"not begin with '{UTTER_PREFIX}' prefix."
-            )
-
-        response[constants.RESPONSE_NAME_KEY] = response_name
-        response["text"] = Response.get_stripped_value(response, "text")
-
-        if self.get_response(project_id, response):
+        if self._response_hash_exists(project_id, new_response.hash):
             raise ValueError(
                 f"Another response with same pair of ({constants.RESPONSE_NAME_KEY}, text) "
-                f"(({response_name},{response['text']})) already exists for this "
-                f"project and domain."
+                f"(({new_response.response_name},{new_response.text})) already "
+                f"exists for this project and domain."
             )
 
-        if not username:
-            username = rasa_x_config.default_username
-
-        hashed_response = _get_hashed_response(response)
-
-        new_response = Response(
-            response_name=response[constants.RESPONSE_NAME_KEY],
-            text=response["text"],
-            content=hashed_response.response_content,
-            annotated_at=time.time(),
-            annotator_id=username,
-            project_id=project_id,
-            hash=hashed_response.content_hash,
-        )
-
-        if domain_id:
-            new_response.domain_id = domain_id
-
         self.add(new_response)
 
         # flush so ID becomes available
@@ -127,6 +189,9 @@ class NlgService(DbService):
         offset: Optional[int] = None,
         sort_by_response_name: bool = False,
         intersect_filters: bool = False,
+        cursor: Optional[Tuple[Optional[Text], int]] = None,
+        include_total: bool = True,
+        match_text_prefix: bool = False,
     ) -> common_utils.QueryResult:
         """Returns a list of responses. Each response includes its response name
         as a property under RESPONSE_NAME.
@@ -154,6 +219,17 @@ class NlgService(DbService):
                 RESPONSE_NAME property.
             intersect_filters: If ``True``, join ``text_query`` and
                 ``response_query`` conditions with an AND instead of an OR.
+            cursor: Response name and ID of the last response of the previous page.
+                If specified, only responses after this response are returned
+                (keyset pagination). In contrast to ``offset`` this doesn't require
+                the database to skip all responses of the previous pages. The
+                response name is only used if ``sort_by_response_name`` is ``True``.
+            include_total: If ``False``, the total number of responses is not
+                determined and returned as ``None``.
+            match_text_prefix: If ``True``, ``text_query`` only matches responses
+                whose text starts with it (case insensitive) instead of responses
+                which contain it anywhere in their text. This query can use the
+                index on the lowercase text of the responses.
 
         Returns:
             List of responses with total number of responses found.
@@ -178,30 +254,87 @@ class NlgService(DbService):
         query_joiner = and_ if intersect_filters else or_
 
         if text_query:
-            query = query_joiner(query, Response.text.ilike(f"%{text_query}%"))
+            query = query_joiner(
+                query, self._text_filter(text_query, match_text_prefix)
+            )
 
         if response_query:
             query = query_joiner(query, Response.response_name.in_(responses_to_query))
 
-        responses = self.query(
-            *common_utils.get_query_selectors(Response, columns)
-        ).filter(query)
+        selectors = common_utils.get_query_selectors(Response, columns)
+        filters = [query]
+        if cursor is not None:
+            filters.append(_responses_after_cursor(cursor, sort_by_response_name))
+
+        # Count the total number of results as part of the same query using a window
+        # function. This isn't possible when using a cursor since the responses of
+        # the previous pages are filtered out, or if the database doesn't support
+        # window functions.
+        count_in_window = (
+            include_total and cursor is None and self.supports_window_functions()
+        )
+        if count_in_window:
+            selectors = selectors + [func.count().over().label("_total")]
+
+        responses = self.query(*selectors).filter(*filters)
 
         if sort_by_response_name:
-            responses = responses.order_by(Response.response_name.asc())
+            # sort by `id` as well, so that the order is unique for the keyset
+            # pagination
+            responses = responses.order_by(
+                Response.response_name.asc(), Response.id.asc()
+            )
+        elif cursor is not None or limit is not None:
+            responses = responses.order_by(Response.id.asc())
+
+        responses = responses.offset(offset).limit(limit)
+        if limit is None:
+            # Load unlimited results in batches and convert them right away, so that
+            # not all rows are kept in memory next to their dictionaries
+            responses = responses.yield_per(RESPONSES_BATCH_SIZE)
+
+        total_number_of_results = None
+        results = []
+        for r in responses:
+            if count_in_window:
+                total_number_of_results = r[-1]
+                # strip the `_total` column again
+                r = r[:-1] if columns else r[0]
+
+            if columns:
+                results.append(common_utils.query_result_to_dict(r, fields_query))
+            else:
+                results.append(r.as_dict())
+
+        if include_total and total_number_of_results is None:
+            total_number_of_results = self.query(Response).filter(query).count()
 
-        total_number_of_results = responses.count()
+        return common_utils.QueryResult(results, total_number_of_results)
 
-        responses = responses.offset(offset).limit(limit).all()
+    def _text_filter(
+        self, text_query: Text, match_text_prefix: bool = False
+    ) -> ColumnElement:
+        """Create the filter expression for a case insensitive text search.
 
-        if columns:
-            results = [
-                common_utils.query_result_to_dict(r, fields_query) for r in responses
-            ]
-        else:
-            results = [t.as_dict() for t in responses]
+        Args:
+            text_query: Text which the responses should be filtered by.
+            match_text_prefix: If ``True``, only match responses whose text starts
+                with ``text_query``.
 
-        return common_utils.QueryResult(results, total_number_of_results)
+        Returns:
+            The filter expression.
+        """
+        if match_text_prefix:
+            # can use the index on `text_lower` (Revision: `e7c4a2b95d13`)
+            return Response.text_lower.like(f"{text_query.lower()}%")
+
+        if self.using_dialect(POSTGRESQL_DIALECT):
+            # This is rendered as `ILIKE` which can use the trigram index on
+            # `response.text` (Revision: `9b3d6f1a8c24`)
+            return Response.text.ilike(f"%{text_query}%")
+
+        # Other databases would lowercase the text of every row to evaluate `ILIKE`
+        return Response.text_lower.like(f"%{text_query.lower()}%")
 
     def get_grouped_responses(
         self, text_query: Optional[Text] = None, response_query: Optional[Text] = None
@@ -216,30 +349,32 @@ class NlgService(DbService):
             `QueryResult` containing grouped responses and total number of responses
             across all groups.
         """
-        # Sort since `groupby` only groups consecutive entries
+        # Sort since `groupby` only groups consecutive entries. The database does the
+        # sorting, so grouping is a single pass over the sorted rows.
         responses = self.fetch_responses(
             text_query=text_query,
             response_query=response_query,
             sort_by_response_name=True,
             intersect_filters=True,
+            include_total=False,
         ).result
 
         grouped_responses = itertools.groupby(
-            responses, key=lambda each: each[constants.RESPONSE_NAME_KEY]
+            responses, key=operator.itemgetter(constants.RESPONSE_NAME_KEY)
         )
 
         result = [
             {constants.RESPONSE_NAME_KEY: k, "responses": list(g)}
             for k, g in grouped_responses
         ]
-        count = sum(len(item["responses"]) for item in result)
 
-        return common_utils.QueryResult(result, count)
+        # every response is part of exactly one group
+        return common_utils.QueryResult(result, len(responses))
 
     def fetch_all_response_names(self) -> Set[Text]:
         """Fetch a list of all response names in db."""
 
-        return {t[constants.RESPONSE_NAME_KEY] for t in self.fetch_responses()[0]}
+        return {name for (name,) in self.query(Response.response_name).distinct()}
 
     def delete_response(self, _id: int) -> bool:
         delete_result = self.query(Response).filter(Response.id == _id).delete()
@@ -273,14 +408,16 @@ class NlgService(DbService):
         response[constants.RESPONSE_NAME_KEY] = response_name
         response["text"] = Response.get_stripped_value(response, "text")
 
-        if self.get_response(old_response.project_id, response):
+        hashed_response = _get_hashed_response(response)
+
+        if self._response_hash_exists(
+            old_response.project_id, hashed_response.content_hash
+        ):
             raise ValueError(
                 f"Response could not be saved since another one with same pair of "
                 f"({constants.RESPONSE_NAME_KEY}, text) exists."
             )
 
-        hashed_response = _get_hashed_response(response)
-
         old_response.response_name = response[constants.RESPONSE_NAME_KEY]
         old_response.text = response["text"]
         old_response.annotated_at = time.time()
@@ -302,17 +439,24 @@ class NlgService(DbService):
 
         Returns the number of inserted responses.
         """
-        self.delete_all_responses()
-        insertions = 0
+        # Validate all responses before touching the database. Maps the content hash
+        # to the response. Since all existing responses are deleted, this is
+        # sufficient to skip duplicates.
+        responses_to_insert = {}
         for response in new_responses:
             try:
-                inserted = self.save_response(response, username, domain_id=domain_id)
-                if inserted:
-                    insertions += 1
+                new_response = _create_response(
+                    response, username, domain_id, rasa_x_config.project_name
+                )
             except ValueError:
-                pass
+                continue
+
+            responses_to_insert.setdefault(new_response.hash, new_response)
+
+        self.delete_all_responses()
+        self.bulk_save_objects(list(responses_to_insert.values()))
 
-        return insertions
+        return len(responses_to_insert)
 
     def get_response(
         self, project_id: Text, response: Dict[Text, Any]
@@ -325,17 +469,39 @@ class NlgService(DbService):
         """
         _fix_response_name_key(response)
 
+        return self._get_response_by_hash(
+            project_id, _get_hashed_response(response).content_hash
+        )
+
+    def _get_response_by_hash(
+        self, project_id: Text, content_hash: Text
+    ) -> Optional[Response]:
         return (
             self.query(Response)
-            .filter(
-                and_(
-                    Response.project_id == project_id,
-                    Response.hash == _get_hashed_response(response).content_hash,
-                )
-            )
+            .filter(_response_hash_filter(project_id, content_hash))
             .first()
         )
 
+    def _response_hash_exists(self, project_id: Text, content_hash: Text) -> bool:
+        """Check if a response with this content exists without loading it.
+
+        Args:
+            project_id: Project ID.
+            content_hash: Hash of the response content.
+
+        Returns:
+            `True` if a response with this hash exists in the project.
+        """
+        # `SELECT EXISTS(...)` is not supported by Oracle, hence only select the
+        # ID of the first match
+        matching_id = (
+            self.query(Response.id)
+            .filter(_response_hash_filter(project_id, content_hash))
+            .first()
+        )
+
+        return matching_id is not None
+
     def mark_responses_as_used(
         self, training_start_time: float, project_id: Text = rasa_x_config.project_name
     ) -> None:
@@ -348,19 +514,15 @@ class NlgService(DbService):
             project_id: Project which was trained.
 
         """
-        responses_which_were_used_in_training = (
-            self.query(Response)
-            .filter(
-                and_(
-                    Response.annotated_at <= training_start_time,
-                    Response.edited_since_last_training,
-                    Response.project_id == project_id,
-                )
+        self.query(Response).filter(
+            and_(
+                Response.annotated_at <= training_start_time,
+                Response.edited_since_last_training,
+                Response.project_id == project_id,
             )
-            .all()
+        ).update(
+            {Response.edited_since_last_training: False}, synchronize_session=False
         )
-        for response in responses_which_were_used_in_training:
-            response.edited_since_last_training = False
 
     def rename_responses(
         self, old_response_name: Text, response: Dict[Text, Text], annotator: Text
@@ -373,19 +535,44 @@ class NlgService(DbService):
             response: The object containing the new response values.
             annotator: The name of the user who is doing the rename.
         """
-        responses = (
-            self.query(Response)
-            .filter(Response.response_name == old_response_name)
-            .all()
+        # Only load the columns which are required to compute the new values
+        responses = self.query(Response.id, Response.content).filter(
+            Response.response_name == old_response_name
         )
         new_response_name = response["name"]
-        for response in responses:
-            content = json.loads(response.content)
+        annotated_at = time.time()
+
+        updated_responses = []
+        for _id, content in responses:
+            content = json.loads(content)
             content[constants.RESPONSE_NAME_KEY] = new_response_name
             hashed_response = _get_hashed_response(content)
 
-            response.response_name = new_response_name
-            response.annotated_at = time.time()
-            response.annotator_id = annotator
-            response.content = hashed_response.response_content
-            response.hash = hashed_response.content_hash
+            updated_responses.append(
+                {
+                    "_id": _id,
+                    "response_name": new_response_name,
+                    "annotated_at": annotated_at,
+                    "annotator_id": annotator,
+                    "content": hashed_response.response_content,
+                    "hash": hashed_response.content_hash,
+                }
+            )
+
+        if not updated_responses:
+            return
+
+        # Update all responses with a single `executemany`
+        response_table = Response.__table__
+        query = (
+            sa.update(response_table)
+            .where(response_table.c.id == sa.bindparam("_id"))
+            .values(
+                response_name=sa.bindparam("response_name"),
+                annotated_at=sa.bindparam("annotated_at"),
+                annotator_id=sa.bindparam("annotator_id"),
+                content=sa.bindparam("content"),
+                hash=sa.bindparam("hash"),
+            )
+        )
+        self.session.execute(query, updated_responses)
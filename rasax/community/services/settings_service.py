@@ -1,9 +1,10 @@
+import copy
 import json
 import logging
-from typing import Dict, Text, Any, Optional, Union, List
+import time
+from typing import Dict, Text, Any, Optional, Union, List, Tuple
 
 import typing
-from ruamel.yaml.compat import ordereddict
 from sanic.request import Request
 from sqlalchemy import and_
 
@@ -25,41 +26,29 @@ if typing.TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# the deployment environments are looked up whenever a request needs to talk to a Rasa
+# server but change rarely, hence it's fine to cache them for a short time (other
+# Rasa X processes don't notice changes before the cached value expires)
+ENVIRONMENTS_CONFIG_CACHE_TTL_IN_SECONDS = 5
+
 
 def default_environments_config_local(rasa_port: Union[int, Text]) -> Dict[Text, Any]:
-    stack_config = ordereddict(
-        [
-            (
-                constants.RASA_PRODUCTION_ENVIRONMENT,
-                ordereddict(
-                    [
-                        ("url", f"http://localhost:{rasa_port}"),
-                        ("token", rasa_x_config.rasa_token),
-                    ]
-                ),
-            ),
-            (
-                constants.RASA_DEVELOPMENT_ENVIRONMENT,
-                ordereddict(
-                    [
-                        ("url", f"http://stuff:{rasa_port}"),
-                        ("token", rasa_x_config.rasa_token),
-                    ]
-                ),
-            ),
-            (
-                constants.RASA_WORKER_ENVIRONMENT,
-                ordereddict(
-                    [
-                        ("url", f"http://localhost:{rasa_port}"),
-                        ("token", rasa_x_config.rasa_token),
-                    ]
-                ),
-            ),
-        ]
-    )
+    stack_config = {
+        constants.RASA_PRODUCTION_ENVIRONMENT: {
+            "url": f"http://localhost:{rasa_port}",
+            "token": rasa_x_config.rasa_token,
+        },
+        constants.RASA_DEVELOPMENT_ENVIRONMENT: {
+            "url": f"http://stuff:{rasa_port}",
+            "token": rasa_x_config.rasa_token,
+        },
+        constants.RASA_WORKER_ENVIRONMENT: {
+            "url": f"http://localhost:{rasa_port}",
+            "token": rasa_x_config.rasa_token,
+        },
+    }
 
-    return {"environments": ordereddict([("rasa", stack_config)])}
+    return {"environments": {"rasa": stack_config}}
 
 
 def default_stack_config() -> Dict[Text, Union[Text, List[Dict[Text, Text]]]]:
@@ -88,9 +77,7 @@ def default_stack_config() -> Dict[Text, Union[Text, List[Dict[Text, Text]]]]:
         {"name": "RulePolicy"},
     ]
 
-    return ordereddict(
-        [("language", "en"), ("pipeline", pipeline), ("policies", policies)]
-    )
+    return {"language": "en", "pipeline": pipeline, "policies": policies}
 
 
 class ProjectException(Exception):
@@ -104,6 +91,9 @@ class ProjectException(Exception):
 
 
 class SettingsService(DbService):
+    # Maps project IDs to the time of the lookup and the found environments config
+    _environments_config_cache: Dict[Text, Tuple[float, Dict[Text, Any]]] = {}
+
     @staticmethod
     def from_request(
         request: Request, other_service: "DbService" = None
@@ -165,14 +155,13 @@ class SettingsService(DbService):
 
         project = self._get_project(team, project_id)
         if project:
+            model_config, config_path = project.get_model_config_and_path()
             if not filename:
                 default_path = str(
                     io_utils.get_project_directory() / rasa_x_config.default_config_path
                 )
-                filename = json.loads(project.config).get("path") or default_path
-            yaml_utils.dump_yaml_to_file(
-                filename=filename, content=project.get_model_config()
-            )
+                filename = config_path or default_path
+            yaml_utils.dump_yaml_to_file(filename=filename, content=model_config)
 
     def save_config(
         self,
@@ -188,7 +177,10 @@ class SettingsService(DbService):
             stack_config["path"] = config_path
 
         project = self._get_project(team, project_id)
-        project.config = json.dumps(stack_config)
+        serialized_config = json.dumps(stack_config)
+        # don't mark the project as modified if the config didn't change
+        if project.config != serialized_config:
+            project.config = serialized_config
 
         if should_dump:
             background_dump_service.add_model_configuration_change(team, project_id)
@@ -290,19 +282,31 @@ class SettingsService(DbService):
     def save_environments_config(
         self, project_id: Text, environments_config: Dict[Text, Any]
     ) -> Dict[Text, Dict[Text, Dict[Text, Text]]]:
-        for name, env_config in environments_config.get("rasa", {}).items():
-            # delete possibly existing config
-            self.delete_environment_config(name, project_id)
-
-            env = Environment(
-                name=name,
-                project=project_id,
-                url=env_config["url"],
-                token=env_config["token"],
+        rasa_config = environments_config.get("rasa", {})
+        if rasa_config:
+            # delete possibly existing configs
+            self.query(Environment).filter(
+                Environment.project == project_id,
+                Environment.name.in_(list(rasa_config.keys())),
+            ).delete(synchronize_session=False)
+
+            self.bulk_insert_mappings(
+                Environment,
+                [
+                    {
+                        "name": name,
+                        "project": project_id,
+                        "url": env_config["url"],
+                        "token": env_config["token"],
+                    }
+                    for name, env_config in rasa_config.items()
+                ],
             )
-            self.add(env)
+            self._environments_config_cache.pop(project_id, None)
 
-        return self.get_environments_config(project_id)
+        # Don't fill the cache with the changes of the current transaction, since
+        # they might still be rolled back
+        return self._query_environments_config(project_id)
 
     def delete_environment_config(self, name: Text, project_id: Text) -> None:
         to_delete = (
@@ -313,12 +317,24 @@ class SettingsService(DbService):
         )
         if to_delete:
             self.delete(to_delete)
+            self._environments_config_cache.pop(project_id, None)
 
     def get_environments_config(self, project_id: Text) -> Dict[Text, Any]:
-        envs = self.query(Environment).filter(Environment.project == project_id).all()
-        envs = [e.as_dict() for e in envs]
+        now = time.time()
+
+        cached = self._environments_config_cache.get(project_id)
+        if cached and now - cached[0] < ENVIRONMENTS_CONFIG_CACHE_TTL_IN_SECONDS:
+            return copy.deepcopy(cached[1])
+
+        environments_config = self._query_environments_config(project_id)
+        self._environments_config_cache[project_id] = (now, environments_config)
+
+        return copy.deepcopy(environments_config)
+
+    def _query_environments_config(self, project_id: Text) -> Dict[Text, Any]:
+        envs = self.query(Environment).filter(Environment.project == project_id)
 
-        return {"environments": {"rasa": {list(e)[0]: e[list(e)[0]] for e in envs}}}
+        return {"environments": {"rasa": dict(e.as_key_value() for e in envs)}}
 
     def get_stack_service(
         self, environment: Text, project_id: Text = rasa_x_config.project_name
@@ -6,10 +6,11 @@ import typing
 from pathlib import Path
 from typing import Any, Text, Dict, List, Optional, Tuple, Set, Union
 
-from sqlalchemy import and_, or_
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
 
-import rasa.shared.constants
 import rasa.shared.core.constants
+from rasa.shared.constants import UTTER_PREFIX
 from rasa.shared.core.domain import Domain as RasaDomain
 from rasa.shared.core.events import ActionExecuted, UserUttered, SlotSet
 from rasa.shared.core.training_data.story_reader.story_reader import (
@@ -42,8 +43,139 @@ if typing:
 
 logger = logging.getLogger(__name__)
 
+# a new StoryStep in a Markdown story file begins with `#` or `##`
+MARKDOWN_STORY_BLOCK_SEPARATOR = re.compile(r"(\n|^)##?")
+
+DEFAULT_ACTION_NAMES = frozenset(rasa.shared.core.constants.DEFAULT_ACTION_NAMES)
+
+
+def _story_steps_match_blocks(
+    steps_list: List[StoryStep], story_texts: List[Text]
+) -> bool:
+    """Check if each Markdown story block was parsed into exactly one `StoryStep`.
+
+    Args:
+        steps_list: `StoryStep`s parsed from the whole Markdown file.
+        story_texts: Story blocks of the Markdown file, each starting with `##`.
+
+    Returns:
+        `True` if there is one `StoryStep` per block and every `StoryStep` has the
+        name of the corresponding block.
+    """
+    if len(steps_list) != len(story_texts):
+        return False
+
+    return all(
+        steps.block_name
+        and steps.block_name == story_text.split("\n", 1)[0].strip("# ")
+        for steps, story_text in zip(steps_list, story_texts)
+    )
+
+
+def _rasa_domain_from_dict(domain: Optional[Dict[Text, Any]]) -> RasaDomain:
+    """Create a `RasaDomain` from its dictionary representation.
+
+    Args:
+        domain: Domain as dictionary.
+
+    Returns:
+        The domain, or an empty domain if `domain` is empty.
+    """
+    # Domain is not needed in `StoryFileReader` when parsing stories, but
+    # if none is provided there will be a UserWarning for each intent.
+    if not domain:
+        return RasaDomain.empty()
+
+    # `RasaDomain.from_dict` modifies nested parts of the dictionary (e.g. the
+    # intent properties)
+    return RasaDomain.from_dict(copy.deepcopy(domain))
+
+
+def _get_domain_items_from_story_steps(
+    steps: List[StoryStep],
+) -> Tuple[Set[Text], Set[Text], Set[Text], Set[Text]]:
+    """Collect the domain items which are used in stories or rules.
+
+    Args:
+        steps: Parsed stories or rules.
+
+    Returns:
+        Sets of the custom actions, intents, slots and entities which are used in
+        `steps`.
+    """
+    actions = set()
+    intents = set()
+    slots = set()
+    entities = set()
+    _add_domain_items_from_story_steps(steps, actions, intents, slots, entities)
+
+    return actions, intents, slots, entities
+
+
+def _add_domain_items_from_story_steps(
+    steps: List[StoryStep],
+    actions: Set[Text],
+    intents: Set[Text],
+    slots: Set[Text],
+    entities: Set[Text],
+) -> None:
+    """Add the domain items which are used in stories or rules to the given sets.
+
+    Args:
+        steps: Parsed stories or rules.
+        actions: Set which the custom actions are added to.
+        intents: Set which the intents are added to.
+        slots: Set which the slots are added to.
+        entities: Set which the entities are added to.
+    """
+    for step in steps:
+        for e in step.events:
+            if isinstance(e, ActionExecuted):
+                action_name = e.action_name
+                # exclude default actions and utter actions
+                if (
+                    action_name not in DEFAULT_ACTION_NAMES
+                    and not action_name.startswith(UTTER_PREFIX)
+                ):
+                    actions.add(action_name)
+            elif isinstance(e, UserUttered):
+                intent = e.intent
+                if intent:
+                    intents.add(intent.get("name"))
+                if e.entities:
+                    entities.update(entity["entity"] for entity in e.entities)
+            elif isinstance(e, SlotSet):
+                slot = e.key
+                if slot:
+                    slots.add(slot)
+
 
 class StoryService(DbService):
+    def __init__(self, session: Optional[Session] = None):
+        # Maps project IDs to their domains. Services only live as long as the
+        # request which created them, so the domain is only fetched once per request.
+        self._domains: Dict[Text, RasaDomain] = {}
+        super().__init__(session)
+
+    def _get_domain(self, project_id: Text) -> RasaDomain:
+        """Return the domain of a project.
+
+        Args:
+            project_id: Project whose domain should be returned.
+
+        Returns:
+            The domain of the project, or an empty domain if the project doesn't
+            have one.
+        """
+        if project_id not in self._domains:
+            from rasax.community.services.domain_service import DomainService
+
+            self._domains[project_id] = _rasa_domain_from_dict(
+                DomainService(self.session).get_domain(project_id)
+            )
+
+        return self._domains[project_id]
+
     @staticmethod
     def _get_reader(
         domain: Domain,
@@ -90,6 +222,35 @@ class StoryService(DbService):
         stories as strings, so this additional method is necessary. Returns a
         list of `StoryStep` from a story string.
 
+        The stories are parsed in memory if the reader supports it. Only other
+        readers get the stories from a temporary file.
+
+        Args:
+            reader: Story reader instance.
+            story_string: Stories in string form.
+
+        Returns:
+            List of `StoryStep`, each element representing a story.
+        """
+        try:
+            if isinstance(reader, YAMLStoryReader):
+                return reader.read_from_string(story_string)
+            if isinstance(reader, MarkdownStoryReader) and hasattr(
+                reader, "_process_lines"
+            ):
+                # `read_from_file` passes the lines of the file to this method
+                return reader._process_lines(story_string.splitlines(keepends=True))
+
+            return StoryService._reader_read_from_temporary_file(reader, story_string)
+        except ValueError as e:
+            raise StoryParseError from e
+
+    @staticmethod
+    def _reader_read_from_temporary_file(
+        reader: "StoryReader", story_string: Text
+    ) -> List[StoryStep]:
+        """Read stories by writing them to a temporary file first.
+
         Args:
             reader: Story reader instance.
             story_string: Stories in string form.
@@ -106,8 +267,6 @@ class StoryService(DbService):
 
         try:
             return reader.read_from_file(temp_path)
-        except ValueError as e:
-            raise StoryParseError from e
         finally:
             os.remove(temp_path)
 
@@ -115,7 +274,7 @@ class StoryService(DbService):
     def get_story_steps(
         story_string: Text,
         file_format: data.FileFormat,
-        domain: Dict[Text, Any] = None,
+        domain: Union[Dict[Text, Any], RasaDomain, None] = None,
         filename: Optional[Text] = None,
     ) -> List[StoryStep]:
         """Returns the stories contained inside a stories file.
@@ -126,20 +285,15 @@ class StoryService(DbService):
         Args:
             story_string: String representing the contents of a stories file.
             file_format: Format the stories file uses.
-            domain: Domain for defined stories.
+            domain: Domain for defined stories. Pass a `RasaDomain` when parsing
+                several story strings, so that it's only built once.
             filename: Name of the file where the text contents come from.
 
         Returns:
             `StoryStep` object for each story contained in the file.
         """
-        # Domain is not needed in `StoryFileReader` when parsing stories, but
-        # if none is provided there will be a UserWarning for each intent.
-        if not domain:
-            domain = {}
-        else:
-            domain = copy.deepcopy(domain)
-
-        domain = RasaDomain.from_dict(domain)
+        if not isinstance(domain, RasaDomain):
+            domain = _rasa_domain_from_dict(domain)
 
         reader = StoryService._get_reader(
             domain, file_format=file_format, filename=filename
@@ -154,16 +308,17 @@ class StoryService(DbService):
             )
 
     def _get_stories_as_markdown_string(self, stories: List[Dict[Text, Any]]) -> Text:
-        bulk_content = ""
+        story_strings = []
         skipped = set()
 
         for story in stories:
             if data.format_from_filename(story["filename"]) == data.FileFormat.MARKDOWN:
-                bulk_content += "{}\n\n".format(story.get("story"))
+                story_strings.append(str(story.get("story")))
             else:
                 skipped.add(story["filename"])
 
-        if len(bulk_content):
+        bulk_content = "\n\n".join(story_strings)
+        if bulk_content:
             bulk_content = bulk_content.strip()
             bulk_content += "\n"
 
@@ -179,12 +334,12 @@ class StoryService(DbService):
     def _get_stories_as_yaml_string(
         self, project_id: Text, stories: List[Dict[Text, Any]]
     ) -> Text:
-        from rasax.community.services.domain_service import DomainService
-
-        domain_service = DomainService(self.session)
-        domain = domain_service.get_domain(project_id)
-
         writer = YAMLStoryWriter()
+        if not stories:
+            # the domain isn't needed to write an empty stories file
+            return writer.dumps([])
+
+        domain = self._get_domain(project_id)
         steps_list = []
 
         for story in stories:
@@ -225,7 +380,7 @@ class StoryService(DbService):
         raise ValueError(f"Unknown file format: '{file_format}'.")
 
     async def _extract_stories_markdown(
-        self, story_string: Text, filename: Text, domain: Optional[Dict[Text, Any]],
+        self, story_string: Text, filename: Text, domain: RasaDomain,
     ) -> List[Tuple[Text, StoryStep]]:
         """Extract stories from the text contents of a Markdown file.
 
@@ -240,16 +395,27 @@ class StoryService(DbService):
         """
         # split up data into blocks (a new StoryStep begins with #)
         # a split on `#` covers stories beginning with either `##` or `#`
-        split_story_string = re.split("(\n|^)##?", story_string)
+        split_story_string = MARKDOWN_STORY_BLOCK_SEPARATOR.split(story_string)
 
         # blocks are the non-empty entries of `split_story_string`
-        blocks = [s for s in split_story_string if s not in ("", "\n")]
+        blocks = (s for s in split_story_string if s not in ("", "\n"))
+        story_texts = ["".join(("##", block)).strip() for block in blocks]
 
-        results = []
+        # Parse the whole file at once. This only works if every block results in
+        # exactly one StoryStep, otherwise the blocks are parsed one by one.
+        try:
+            steps_list = self.get_story_steps(
+                story_string, data.FileFormat.MARKDOWN, domain, filename
+            )
+        except StoryParseError:
+            steps_list = []
 
-        for block in blocks:
-            story_text = "".join(("##", block)).strip()
+        if _story_steps_match_blocks(steps_list, story_texts):
+            return list(zip(story_texts, steps_list))
 
+        results = []
+
+        for story_text in story_texts:
             # Here, we get a list of StorySteps. A StoryStep is a
             # single story block that may or may not contain
             # checkpoints. A story file contains one or more StorySteps
@@ -267,7 +433,7 @@ class StoryService(DbService):
         return results
 
     async def _extract_stories_yaml(
-        self, story_string: Text, filename: Text, domain: Optional[Dict[Text, Any]],
+        self, story_string: Text, filename: Text, domain: RasaDomain,
     ) -> List[Tuple[Text, StoryStep]]:
         """Extract stories from the text contents of a YAML file.
 
@@ -333,18 +499,13 @@ class StoryService(DbService):
         if not filename and not file_format:
             raise ValueError("Not enough information to determine story format.")
 
-        from rasax.community.services.domain_service import DomainService
-
-        domain_service = DomainService(self.session)
-        domain = domain_service.get_domain(project_id)
+        domain = self._get_domain(project_id)
 
         if filename:
             file_format = data.format_from_filename(filename)
         else:
             filename = self.assign_filename(team, file_format)
 
-        inserted = []
-
         if file_format == data.FileFormat.MARKDOWN:
             processed_stories = await self._extract_stories_markdown(
                 story_string, filename, domain
@@ -356,25 +517,30 @@ class StoryService(DbService):
         else:
             raise ValueError(f"Unknown file format: '{file_format}'.")
 
-        for story_text, steps in processed_stories:
-            new_story = Story(
+        # all stories of the file are annotated at the same time
+        annotated_at = time.time()
+        new_stories = [
+            Story(
                 name=steps.block_name,
                 story=story_text,
-                annotated_at=time.time(),
+                annotated_at=annotated_at,
                 user=username,
                 filename=filename,
                 is_rule=isinstance(steps, RuleStep),
             )
+            for story_text, steps in processed_stories
+        ]
 
-            self.add(new_story)
+        self.add_all(new_stories)
+        self.flush()  # flush to get inserted story ids
 
-            self.flush()  # flush to get inserted story id
-            if add_story_items_to_domain:
-                await self.add_domain_items_for_story(
-                    new_story.id, project_id, username, file_format
-                )
+        if add_story_items_to_domain and new_stories:
+            story_steps = [steps for _, steps in processed_stories]
+            await self._add_story_items_to_domain(
+                project_id, username, _get_domain_items_from_story_steps(story_steps),
+            )
 
-            inserted.append(new_story.as_dict())
+        inserted = [new_story.as_dict() for new_story in new_stories]
 
         if inserted:
             if dump_stories:
@@ -522,7 +688,7 @@ class StoryService(DbService):
             query = True
 
         if id_query:
-            query = and_(query, or_(Story.id == id for id in id_query))
+            query = and_(query, Story.id.in_(id_query))
 
         if filename:
             query = and_(query, Story.filename == filename)
@@ -531,11 +697,16 @@ class StoryService(DbService):
             query = and_(query, Story.is_rule == fetch_rules)
 
         columns = common_utils.get_columns_from_fields(field_query)
-        stories = self.query(*common_utils.get_query_selectors(Story, columns)).filter(
-            query
-        )
+        if columns:
+            selectors = common_utils.get_query_selectors(Story, columns)
+        else:
+            # select the columns instead of `Story` objects to skip the ORM overhead
+            selectors = Story.as_dict_columns()
+        stories = self.query(*selectors).filter(query)
 
-        if distinct:
+        # rows which include the primary key are unique anyway, and `DISTINCT` would
+        # have to compare the full story texts
+        if distinct and columns and "id" not in columns:
             stories = stories.distinct()
 
         stories = stories.order_by(Story.id.asc()).offset(offset).limit(limit).all()
@@ -545,7 +716,7 @@ class StoryService(DbService):
                 common_utils.query_result_to_dict(s, field_query) for s in stories
             ]
         else:
-            results = [t.as_dict() for t in stories]
+            results = [Story.row_as_dict(s) for s in stories]
 
         return results
 
@@ -571,7 +742,7 @@ class StoryService(DbService):
             steps_list = StoryService.get_story_steps(
                 story["story"],
                 data.format_from_filename(story["filename"]),
-                domain.as_dict(),
+                domain,
                 story["filename"],
             )
             parsed_story_steps.extend(steps_list)
@@ -637,10 +808,7 @@ class StoryService(DbService):
     async def _fetch_domain_items_from_story(
         self, story_id: Text, project_id: Text, file_format: data.FileFormat
     ) -> Optional[Tuple[Set[Text], Set[Text], Set[Text], Set[Text]]]:
-        from rasax.community.services.domain_service import DomainService
-
-        domain_service = DomainService(self.session)
-        domain = domain_service.get_domain(project_id)
+        domain = self._get_domain(project_id)
 
         story = self.fetch_story(story_id)
 
@@ -648,34 +816,8 @@ class StoryService(DbService):
             return None
 
         steps = self.get_story_steps(story["story"], file_format, domain)
-        story_actions = set()
-        story_intents = set()
-        story_entities = set()
-        story_slots = set()
-        for step in steps:
-            for e in step.events:
-                if (
-                    isinstance(e, ActionExecuted)
-                    # exclude default actions and utter actions
-                    and e.action_name
-                    not in rasa.shared.core.constants.DEFAULT_ACTION_NAMES
-                    and not e.action_name.startswith(rasa.shared.constants.UTTER_PREFIX)
-                ):
-                    story_actions.add(e.action_name)
-                elif isinstance(e, UserUttered):
-                    intent = e.intent
-                    entities = e.entities
-                    if intent:
-                        story_intents.add(intent.get("name"))
-                    if entities:
-                        entity_names = [e["entity"] for e in entities]
-                        story_entities.update(entity_names)
-                elif isinstance(e, SlotSet):
-                    slot = e.key
-                    if slot:
-                        story_slots.add(slot)
-
-        return story_actions, story_intents, story_slots, story_entities
+
+        return _get_domain_items_from_story_steps(steps)
 
     async def fetch_domain_items_from_stories(
         self, project_id: Text
@@ -684,23 +826,22 @@ class StoryService(DbService):
 
         Returns a tuple of four sets.
         """
-        stories = self.fetch_stories()
+        stories = self.query(Story.story, Story.filename).order_by(Story.id).all()
 
         if not stories:
             return None
 
+        domain = self._get_domain(project_id)
+
         actions = set()
         intents = set()
         slots = set()
         entities = set()
-        for story in stories:
-            story_events = await self._fetch_domain_items_from_story(
-                story["id"], project_id, data.format_from_filename(story["filename"])
+        for story_string, filename in stories:
+            steps = self.get_story_steps(
+                story_string, data.format_from_filename(filename), domain
             )
-            actions.update(story_events[0])
-            intents.update(story_events[1])
-            slots.update(story_events[2])
-            entities.update(story_events[3])
+            _add_domain_items_from_story_steps(steps, actions, intents, slots, entities)
 
         return actions, intents, slots, entities
 
@@ -750,6 +891,8 @@ class StoryService(DbService):
             dump_data=False,
             origin="stories",
         )
+        # the domain might have changed
+        self._domains.pop(project_id, None)
 
     async def update_story(
         self,
@@ -779,15 +922,6 @@ class StoryService(DbService):
             Updated story/rule in dictionary form, if it was found. Otherwise,
             returns `None`.
         """
-        from rasax.community.services.domain_service import DomainService
-
-        domain_service = DomainService(self.session)
-        domain = domain_service.get_domain(project_id)
-
-        story_steps = self.get_story_steps(story_string, file_format, domain)
-        if not story_steps:
-            return None
-
         story = self.query(Story).filter(Story.id == story_id)
         if update_rule is not None:
             story = story.filter(Story.is_rule == update_rule)
@@ -797,6 +931,12 @@ class StoryService(DbService):
         if not story:
             return None
 
+        domain = self._get_domain(project_id)
+
+        story_steps = self.get_story_steps(story_string, file_format, domain)
+        if not story_steps:
+            return None
+
         if story.is_rule != isinstance(story_steps[0], RuleStep):
             raise ValueError(
                 "Can't replace contents of a story with a rule, or vice-versa."
@@ -808,12 +948,13 @@ class StoryService(DbService):
         story.story = story_string.strip()
 
         # Change filename extension, but keep name the same.
-        story.filename = str(Path(story.filename).with_suffix(file_format.value))
+        if not story.filename.endswith(file_format.value):
+            story.filename = str(Path(story.filename).with_suffix(file_format.value))
 
         background_dump_service.add_story_change(story.filename)
 
-        await self.add_domain_items_for_story(
-            story_id, project_id, story.user, file_format
+        await self._add_story_items_to_domain(
+            project_id, story.user, _get_domain_items_from_story_steps(story_steps)
         )
 
         return story.as_dict()
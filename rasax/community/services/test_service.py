@@ -1,7 +1,7 @@
 import re
 import os
 import logging
-from typing import Optional, Text, List
+from typing import Optional, Text, List, Dict, Tuple, Union
 from pathlib import Path
 
 import rasax.community.config as rasa_x_config
@@ -10,14 +10,79 @@ import rasax.community.utils.io as io_utils
 
 logger = logging.getLogger(__name__)
 
-DEFAULT_FILENAME = str(
+DEFAULT_FILENAME = (
     Path(rasa_x_config.default_e2e_tests_dir) / rasa_x_config.default_e2e_test_file_path
 )
 
 
+# a new test story begins with `#` or `##`
+TEST_SEPARATOR = re.compile(r"(?:\n|^)##?")
+
+# Maps test file paths to the modification time and size of the file when it was
+# read, and the tests it contained
+_tests_cache: Dict[Text, Tuple[int, int, List[Text]]] = {}
+
+
+def _cache_tests(filename: Union[Text, Path], tests: List[Text]) -> None:
+    """Remember the tests of a file until the file is modified.
+
+    Args:
+        filename: Path to a test file which contains `tests`.
+        tests: The tests in the file.
+    """
+    stat_result = os.stat(filename)
+    _tests_cache[str(filename)] = (
+        stat_result.st_mtime_ns,
+        stat_result.st_size,
+        list(tests),
+    )
+
+
+def _get_cached_tests(filename: Union[Text, Path]) -> Optional[List[Text]]:
+    """Get the tests of a file if the file didn't change since it was cached.
+
+    Args:
+        filename: Path to a test file.
+
+    Returns:
+        The tests of the file, or `None` if they are not cached.
+    """
+    cached = _tests_cache.get(str(filename))
+    if not cached:
+        return None
+
+    try:
+        stat_result = os.stat(filename)
+    except OSError:
+        return None
+
+    if cached[:2] != (stat_result.st_mtime_ns, stat_result.st_size):
+        return None
+
+    return list(cached[2])
+
+
+def _get_test_file_path(filename: Optional[Text] = None) -> Union[Text, Path]:
+    """Get the path to a test file.
+
+    Args:
+        filename: Path to a test file.
+
+    Returns:
+        `filename`, or the path to the default test file of the project if
+        `filename` is not set.
+    """
+    return filename or io_utils.get_project_directory() / DEFAULT_FILENAME
+
+
 def _split_tests(tests_string: Text) -> List[Text]:
-    split_tests_string = re.split("(\n|^)##?", tests_string)
-    return [s.strip() for s in split_tests_string if s not in ("", "\n")]
+    if "#" not in tests_string:
+        # there is at most a single test without a header
+        test = tests_string.strip()
+        return [test] if test else []
+
+    split_tests_string = (s.strip() for s in TEST_SEPARATOR.split(tests_string))
+    return [s for s in split_tests_string if s]
 
 
 def get_tests_from_file(filename: Optional[Text] = None) -> List[Text]:
@@ -27,12 +92,17 @@ def get_tests_from_file(filename: Optional[Text] = None) -> List[Text]:
         filename: Path to a test file.
     """
 
-    if not filename:
-        filename = io_utils.get_project_directory() / DEFAULT_FILENAME
+    filename = _get_test_file_path(filename)
+
+    cached_tests = _get_cached_tests(filename)
+    if cached_tests is not None:
+        return cached_tests
 
     try:
         content = io_utils.read_file(filename)
-        return _split_tests(content)
+        tests = _split_tests(content)
+        _cache_tests(filename, tests)
+        return tests
     except ValueError as e:
         cli_utils.raise_warning(
             f"Unable to get tests from {filename}:\n{e} "
@@ -51,13 +121,17 @@ def delete_tests_from_file(filename: Optional[Text] = None):
         filename: Path to a test file.
     """
 
-    if not filename:
-        filename = io_utils.get_project_directory() / DEFAULT_FILENAME
+    filename = _get_test_file_path(filename)
+
+    _tests_cache.pop(str(filename), None)
 
     try:
         os.remove(filename)
+    except FileNotFoundError:
+        # nothing to delete
+        logger.debug("Test file %s doesn't exist.", filename)
     except OSError:
-        logger.exception(f"Unable to delete tests from {filename}")
+        logger.exception("Unable to delete tests from %s", filename)
 
 
 class TestService:
@@ -72,18 +146,38 @@ class TestService:
             filename: Path to a test file.
         """
 
-        if not filename:
-            filename = io_utils.get_project_directory() / DEFAULT_FILENAME
+        incoming_tests = _split_tests(tests_string)
+        if not incoming_tests:
+            return []
 
-        existing_tests = get_tests_from_file(filename)
-        new_tests = [
-            test for test in _split_tests(tests_string) if test not in existing_tests
-        ]
+        filename = _get_test_file_path(filename)
+
+        # a missing file is expected when the first tests are saved
+        existing_tests = (
+            get_tests_from_file(filename) if os.path.isfile(filename) else []
+        )
+
+        # also contains the accepted new tests, so that duplicates within
+        # `tests_string` are only saved once
+        known_tests = set(existing_tests)
+        new_tests = []
+        saved_tests = []
+        for test in incoming_tests:
+            if test not in known_tests:
+                known_tests.add(test)
+                new_tests.append(test)
+                saved_tests.append(f"## {test}")
 
         if new_tests:
-            all_tests = [f"## {test}\n" for test in existing_tests + new_tests]
+            # tests are separated by an empty line
+            formatted_new_tests = "\n\n".join(saved_tests) + "\n"
+
+            if existing_tests:
+                # keep the existing tests as they are and only append the new ones
+                io_utils.write_file(filename, "\n" + formatted_new_tests, mode="a")
+            else:
+                io_utils.write_file(filename, formatted_new_tests)
 
-            io_utils.create_directory(os.path.dirname(filename))
-            io_utils.write_file(filename, "\n".join(all_tests))
+            _cache_tests(filename, existing_tests + new_tests)
 
-        return [f"## {test}" for test in new_tests]
+        return saved_tests
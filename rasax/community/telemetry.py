@@ -1,3 +1,4 @@
+import atexit
 import os
 import datetime
 import hashlib
@@ -6,10 +7,12 @@ import uuid
 import asyncio  # pytype: disable=pyi-error
 import urllib.parse
 import platform
+import queue as queue_module
 from multiprocessing.context import BaseContext  # type: ignore
 
 import requests
-from functools import wraps
+import ujson
+from functools import lru_cache, wraps
 from typing import Any, Dict, Optional, Text, TYPE_CHECKING, Union, List
 
 from sqlalchemy.orm import Session
@@ -35,13 +38,21 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
-SEGMENT_ENDPOINT = "https://api.segment.io/v1/track"
+SEGMENT_ENDPOINT = "https://api.segment.io/v1/batch"
 USER_GROUPS_ENDPOINT = os.environ.get(
     "USER_GROUPS_ENDPOINT", "https://rasa.com/.netlify/functions/rasa-x-user-groups"
 )
 TELEMETRY_HTTP_TIMEOUT = 2  # Seconds
+# Maximum number of events which are sent to Segment in a single request
+TELEMETRY_BATCH_SIZE = 50
+# Time to wait for the remaining events to be sent when Rasa X shuts down
+TELEMETRY_SHUTDOWN_TIMEOUT = 5  # Seconds
 ENVIRONMENT_LIVE_TIMEOUT = 2  # Seconds
 USER_GROUPS_HTTP_TIMEOUT = 5  # Seconds
+# Maximum number of concurrent connections to the user groups endpoint. Requests
+# beyond this limit wait for a free connection instead of all hitting the endpoint
+# at once and failing with connection errors.
+USER_GROUPS_MAX_CONNECTIONS = 10
 TELEMETRY_ID = "metrics_id"
 TELEMETRY_ID_LENGTH = 64
 
@@ -73,6 +84,21 @@ MESSAGE_ANNOTATED_CONVERSATIONS = "conversations"
 MESSAGE_ANNOTATED_NEW_DATA = "annotate_new_data"
 MESSAGE_ANNOTATED_INTERACTIVE_LEARNING = "interactive_learning"
 
+# Context fields which are added to every event. The values don't change while the
+# process is running, so they are only computed once.
+_DEFAULT_CONTEXT_FIELDS = {
+    "os": {"name": platform.system(), "version": platform.release()}
+}
+
+# Environment names which are sent in plain text as they are the Rasa X defaults
+_DEFAULT_ENVIRONMENT_NAMES = frozenset(
+    [
+        constants.RASA_PRODUCTION_ENVIRONMENT,
+        constants.RASA_WORKER_ENVIRONMENT,
+        constants.RASA_DEVELOPMENT_ENVIRONMENT,
+    ]
+)
+
 FROM_INTERACTIVE = "interactive"
 FROM_STORIES = "stories"
 
@@ -81,6 +107,14 @@ _telemetry_queue = None
 # Variable to keep track if `_telemetry_queue` was closed. Each process will update
 # this itself
 _telemetry_queue_is_closed = False
+# HTTP sessions which are reused across requests of the current process so that
+# connections to the external services are kept alive
+_requests_session: Optional[requests.Session] = None
+_aiohttp_session: Optional[aiohttp.ClientSession] = None
+_aiohttp_session_loop: Optional[asyncio.AbstractEventLoop] = None
+# Telemetry ID of this Rasa X install once it was read. The ID doesn't change after
+# it was created.
+_telemetry_id: Optional[Text] = None
 
 
 def ensure_telemetry_enabled(f):
@@ -151,8 +185,51 @@ def set_events_queue(queue: Optional["Queue"]) -> None:
     _telemetry_queue = queue
 
 
+def _get_requests_session() -> requests.Session:
+    """Return the `requests` session of the current process.
+
+    Returns:
+        The session, which is created on first use.
+    """
+    global _requests_session
+
+    if _requests_session is None:
+        _requests_session = requests.Session()
+
+    return _requests_session
+
+
+def _get_aiohttp_session() -> aiohttp.ClientSession:
+    """Return the `aiohttp` session for the currently running event loop.
+
+    Returns:
+        The session, which is created on first use and recreated if the event loop
+        changed or the session was closed.
+    """
+    global _aiohttp_session, _aiohttp_session_loop
+
+    loop = asyncio.get_event_loop()
+    if (
+        _aiohttp_session is None
+        or _aiohttp_session.closed
+        or _aiohttp_session_loop is not loop
+    ):
+        _aiohttp_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=USER_GROUPS_MAX_CONNECTIONS),
+            read_timeout=USER_GROUPS_HTTP_TIMEOUT,
+        )
+        _aiohttp_session_loop = loop
+
+    return _aiohttp_session
+
+
+@lru_cache(maxsize=1)
 def segment_request_header(write_key: Text) -> Dict[Text, Any]:
-    """Use a segment write key to create authentication headers for the segment API."""
+    """Use a segment write key to create authentication headers for the segment API.
+
+    The headers are cached per write key, so the returned dictionary must not be
+    modified.
+    """
 
     return {
         "Authorization": "Basic {}".format(common_utils.encode_base64(write_key + ":")),
@@ -169,6 +246,7 @@ def segment_request_payload(
     """Compose a valid payload for the segment API."""
 
     return {
+        "type": "track",
         "userId": distinct_id,
         "event": event_name,
         "properties": properties or {},
@@ -176,6 +254,22 @@ def segment_request_payload(
     }
 
 
+@lru_cache(maxsize=4096)
+def _sha256_hex(value: Text) -> Text:
+    """Hash a value which should not be sent in plain text.
+
+    The same values (e.g. usernames) are hashed over and over again, hence the
+    results are cached.
+
+    Args:
+        value: The value to hash.
+
+    Returns:
+        Hex digest of the SHA256 hash of the value.
+    """
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
 def _context_allows_telemetry() -> bool:
     """Check if this Rasa X build is enabled to make requests to external
     services, like Segment or https://rasa.com.
@@ -198,56 +292,77 @@ def _context_allows_telemetry() -> bool:
     return True
 
 
-def _send_event(
-    distinct_id: Text,
-    event_name: Text,
-    properties: Optional[Dict[Text, Any]] = None,
-    context: Optional[Dict[Text, Any]] = None,
-) -> None:
-    """Sends the contents of an event to the /track Segment endpoint.
-    Documentation: https://segment.com/docs/sources/server/http/
+def _events_can_be_sent() -> bool:
+    """Check if events which are tracked now could be sent at all.
+
+    In contrast to `_context_allows_telemetry` this doesn't log anything, as it is
+    called for every tracked event. It doesn't change whether telemetry is
+    considered enabled, since that reflects the user's choice.
+
+    Returns:
+        `True` if this build is allowed to send events.
+    """
+    return (
+        bool(rasa_x_config.telemetry_write_key)
+        and not common_utils.in_continuous_integration()
+    )
+
+
+def _send_events(distinct_id: Text, events: List[Dict[Text, Any]]) -> None:
+    """Sends the contents of multiple events to the /batch Segment endpoint.
+    Documentation: https://segment.com/docs/sources/server/http/#batch
 
     Do not call this function from outside telemetry.py! This function does not
     check if telemetry is enabled or not.
 
     Args:
         distinct_id: Unique telemetry ID.
-        event_name: Name of the event.
-        properties: Values to send along the event.
-        context: Context information about the event.
+        events: Events taken from the telemetry events queue.
     """
     if not _context_allows_telemetry():
         return
 
     headers = segment_request_header(rasa_x_config.telemetry_write_key)
-    payload = segment_request_payload(distinct_id, event_name, properties, context)
+    payload = {
+        "batch": [
+            segment_request_payload(
+                distinct_id, event["name"], event["properties"], event["context"]
+            )
+            for event in events
+        ]
+    }
 
-    resp = requests.post(
-        SEGMENT_ENDPOINT, headers=headers, json=payload, timeout=TELEMETRY_HTTP_TIMEOUT
+    resp = _get_requests_session().post(
+        SEGMENT_ENDPOINT,
+        headers=headers,
+        data=ujson.dumps(payload),
+        timeout=TELEMETRY_HTTP_TIMEOUT,
     )
+    # Segment responds with a 2xx status code once the events are accepted, hence
+    # the response body doesn't need to be parsed
     resp.raise_for_status()
 
-    data = resp.json()
-    if not data.get("success"):
-        raise Exception(f"Got an unsuccessful response from Segment: {data}")
-
 
 def _with_default_context_fields(
     context: Optional[Dict[Text, Any]] = None,
 ) -> Dict[Text, Any]:
-    """Return a new context dictionary that contains the default field values merged
+    """Return a context dictionary that contains the default field values merged
     with the provided ones. The default fields contain only the OS information for now.
 
+    If no context is provided, the shared default fields are returned as they are.
+    The returned dictionary must therefore not be modified.
+
     Args:
         context: Context information about the event.
 
     Return:
-        A new context.
+        The context.
     """
 
-    context = context or {}
+    if not context:
+        return _DEFAULT_CONTEXT_FIELDS
 
-    return {"os": {"name": platform.system(), "version": platform.release()}, **context}
+    return {**_DEFAULT_CONTEXT_FIELDS, **context}
 
 
 def _track_internal(
@@ -266,6 +381,10 @@ def _track_internal(
         context: Context information about the event.
     """
 
+    if not _events_can_be_sent():
+        # The consuming process would drop the event anyway
+        return
+
     queue = get_events_queue()
 
     if not queue:
@@ -314,20 +433,21 @@ def track_project_status(session: Optional[Session] = None) -> None:
             new one with `session_scope`.
     """
 
-    loop = asyncio.new_event_loop()
+    if not _events_can_be_sent():
+        # Don't collect the project statistics if the event can't be sent anyway
+        return
 
-    try:
-        if not session:
-            with db_utils.session_scope() as db_session:
-                status_event = loop.run_until_complete(
-                    _get_project_status_event(db_session)
-                )
-        else:
-            status_event = loop.run_until_complete(_get_project_status_event(session))
+    if not session:
+        with db_utils.session_scope() as db_session:
+            status_event = common_utils.run_in_thread_loop(
+                _get_project_status_event(db_session)
+            )
+    else:
+        status_event = common_utils.run_in_thread_loop(
+            _get_project_status_event(session)
+        )
 
-        track(STATUS_EVENT, status_event)
-    finally:
-        loop.close()
+    track(STATUS_EVENT, status_event)
 
 
 async def _get_project_status_event(
@@ -343,21 +463,62 @@ async def _get_project_status_event(
         A dictionary containing statistics describing the current project's status.
     """
 
+    from rasax.community.services.settings_service import SettingsService
+    from rasax.community.services import stack_service
+
+    settings_service = SettingsService(session)
+    rasa_services = settings_service.stack_services(project_id)
+
+    # The statistics are collected on the calling thread: the session might already
+    # hold a connection which can't be used from other threads (e.g. SQLite) and
+    # might contain changes which aren't committed yet.
+    project_statistics = _get_project_statistics(session, project_id)
+    version_responses = await stack_service.collect_version_calls(
+        rasa_services, timeout_in_seconds=ENVIRONMENT_LIVE_TIMEOUT
+    )
+
+    environment_names = _environment_names(rasa_services)
+
+    return {
+        # Use the SHA256 of the project ID in case its value contains
+        # information about the user's use of Rasa X. On the analytics side,
+        # having the original value or the hash makes no difference. This
+        # reasoning is also applied on other values sent in this module.
+        "project": _sha256_hex(project_id),
+        "local_mode": rasa_x_config.LOCAL_MODE,
+        "rasa_x": __version__,
+        "rasa_open_source": _rasa_version(version_responses),
+        **project_statistics,
+        "num_environments": len(environment_names),
+        "environment_names": environment_names,
+        "num_live_environments": _number_of_live_rasa_environments(version_responses),
+        "uptime_seconds": common_utils.get_uptime(),
+    }
+
+
+def _get_project_statistics(session: Session, project_id: Text) -> Dict[Text, Any]:
+    """Collect the statistics of the project's training data and conversations.
+
+    Args:
+        session: Database session.
+        project_id: The project ID.
+
+    Returns:
+        A dictionary containing the statistics which are part of the `status` event.
+    """
+
     from rasax.community.services.event_service import EventService
     from rasax.community.services.domain_service import DomainService
     from rasax.community.services.model_service import ModelService
     from rasax.community.services.data_service import DataService
     from rasax.community.services.story_service import StoryService
-    from rasax.community.services.settings_service import SettingsService
     import rasax.community.services.test_service as test_service
-    from rasax.community.services import stack_service
 
     event_service = EventService(session)
     domain_service = DomainService(session)
     model_service = ModelService(rasa_x_config.rasa_model_dir, session)
     data_service = DataService(session)
     story_service = StoryService(session)
-    settings_service = SettingsService(session)
 
     domain = domain_service.get_domain(project_id) or {}
     nlu_data = data_service.get_nlu_training_data_object(project_id=project_id)
@@ -366,37 +527,21 @@ async def _get_project_status_event(
     num_events = event_service.get_events_count()
     num_models = model_service.get_model_count()
     lookup_tables = data_service.get_lookup_tables(project_id, include_filenames=True)
-    num_lookup_table_files = len({table["filename"] for table in lookup_tables})
-    num_lookup_table_entries = sum(
-        table.get("number_of_elements", 0) for table in lookup_tables
-    )
+    lookup_table_files = set()
+    num_lookup_table_entries = 0
+    for table in lookup_tables:
+        lookup_table_files.add(table["filename"])
+        num_lookup_table_entries += table.get("number_of_elements", 0)
     synonyms = data_service.get_entity_synonyms(project_id)
     num_synonyms = sum(len(entry["synonyms"]) for entry in synonyms)
     num_regexes = data_service.get_regex_features(project_id).count
 
-    rasa_services = settings_service.stack_services(project_id)
-    version_responses = await stack_service.collect_version_calls(
-        rasa_services, timeout_in_seconds=ENVIRONMENT_LIVE_TIMEOUT
-    )
-
-    environment_names = _environment_names(rasa_services)
-
     tags = event_service.get_all_conversation_tags()
-    conversations_with_tags = set()
-    for tag in tags:
-        conversations_with_tags.update(tag["conversations"])
+    conversations_with_tags = set().union(*(tag["conversations"] for tag in tags))
 
     e2e_tests = test_service.get_tests_from_file()
 
     return {
-        # Use the SHA256 of the project ID in case its value contains
-        # information about the user's use of Rasa X. On the analytics side,
-        # having the original value or the hash makes no difference. This
-        # reasoning is also applied on other values sent in this module.
-        "project": hashlib.sha256(project_id.encode("utf-8")).hexdigest(),
-        "local_mode": rasa_x_config.LOCAL_MODE,
-        "rasa_x": __version__,
-        "rasa_open_source": _rasa_version(version_responses),
         "num_intent_examples": len(nlu_data.intent_examples),
         "num_entity_examples": len(nlu_data.entity_examples),
         "num_actions": len(domain.get("actions", [])),
@@ -411,14 +556,10 @@ async def _get_project_status_event(
         "num_conversations": num_conversations,
         "num_events": num_events,
         "num_models": num_models,
-        "num_lookup_table_files": num_lookup_table_files,
+        "num_lookup_table_files": len(lookup_table_files),
         "num_lookup_table_entries": num_lookup_table_entries,
         "num_synonyms": num_synonyms,
         "num_regexes": num_regexes,
-        "num_environments": len(environment_names),
-        "environment_names": environment_names,
-        "num_live_environments": _number_of_live_rasa_environments(version_responses),
-        "uptime_seconds": common_utils.get_uptime(),
         "num_tags": len(tags),
         "num_conversations_with_tags": len(conversations_with_tags),
         "num_e2e_tests": len(e2e_tests),
@@ -470,20 +611,26 @@ def _environment_names(rasa_services: Dict[Text, Any]) -> List[Text]:
         Names of configured Rasa environments.
     """
     return [
-        (
-            name
-            if name
-            in [
-                constants.RASA_PRODUCTION_ENVIRONMENT,
-                constants.RASA_WORKER_ENVIRONMENT,
-                constants.RASA_DEVELOPMENT_ENVIRONMENT,
-            ]
-            else hashlib.sha256(name.encode("utf-8")).hexdigest()
-        )
-        for name in rasa_services.keys()
+        name if name in _DEFAULT_ENVIRONMENT_NAMES else _sha256_hex(name)
+        for name in rasa_services
     ]
 
 
+def _referrer_path(referrer: Text) -> Text:
+    """Get the path of a 'Referer' HTTP header value.
+
+    `urlsplit` is used instead of `urlparse` since the path parameters are not
+    needed, and `urlsplit` caches its results.
+
+    Args:
+        referrer: Value of the 'Referer' header.
+
+    Returns:
+        The path of the referring URL.
+    """
+    return urllib.parse.urlsplit(referrer).path
+
+
 @ensure_telemetry_enabled
 def track_story_created(referrer: Optional[Text]) -> None:
     """Tracks an event when a new story is created."""
@@ -492,7 +639,7 @@ def track_story_created(referrer: Optional[Text]) -> None:
         return
 
     origin = None
-    path = urllib.parse.urlparse(referrer).path
+    path = _referrer_path(referrer)
 
     if path.startswith("/interactive"):
         origin = FROM_INTERACTIVE
@@ -511,7 +658,7 @@ def track_e2e_test_created(referrer: Optional[Text]) -> None:
         return
 
     origin = None
-    path = urllib.parse.urlparse(referrer).path
+    path = _referrer_path(referrer)
 
     if path.startswith("/interactive"):
         origin = FROM_INTERACTIVE
@@ -537,7 +684,7 @@ def track_message_annotated_from_referrer(referrer: Optional[Text] = None) -> No
     if not referrer:
         return
 
-    path = urllib.parse.urlparse(referrer).path
+    path = _referrer_path(referrer)
 
     if path.startswith("/conversations"):
         origin = MESSAGE_ANNOTATED_CONVERSATIONS
@@ -554,7 +701,7 @@ def track_message_received(username: Text, channel: Optional[Text]) -> None:
     track(
         MESSAGE_RECEIVED_EVENT,
         {
-            "username": hashlib.sha256(username.encode("utf-8")).hexdigest(),
+            "username": _sha256_hex(username),
             "channel": channel or constants.DEFAULT_CHANNEL_NAME,
         },
     )
@@ -569,37 +716,37 @@ async def get_user_groups() -> List[Text]:
         List containing strings, each one representing a telemetry group the user
         belongs to (for example, "power users").
     """
-    telemetry_id = get_telemetry_id()
-
     # Check first if we're allowed to make the HTTP request to an external service.
-    if not all([_context_allows_telemetry(), is_telemetry_enabled(), telemetry_id]):
-        # If not, assume there's no groups.
+    # If not, assume there's no groups. The telemetry ID is only fetched afterwards
+    # as this might require a database query.
+    if not is_telemetry_enabled() or not _context_allows_telemetry():
+        return []
+
+    telemetry_id = get_telemetry_id()
+    if not telemetry_id:
         return []
 
-    user_groups = []
     params = {"user_id": telemetry_id}
 
     try:
-        async with aiohttp.ClientSession(
-            read_timeout=USER_GROUPS_HTTP_TIMEOUT
-        ) as session:
-            async with session.get(USER_GROUPS_ENDPOINT, params=params) as resp:
-                resp.raise_for_status()
-                user_groups = await resp.json()
-
-                if not isinstance(user_groups, list):
-                    raise ValueError(
-                        f"User groups data must be a list, got: {user_groups}"
-                    )
-
-                if not all([isinstance(group, str) for group in user_groups]):
-                    raise ValueError(
-                        f"Each user group must be a string, got: {user_groups}"
-                    )
+        session = _get_aiohttp_session()
+        async with session.get(USER_GROUPS_ENDPOINT, params=params) as resp:
+            resp.raise_for_status()
+            user_groups = await resp.json()
+
+            if not isinstance(user_groups, list):
+                raise ValueError(f"User groups data must be a list, got: {user_groups}")
+
+            if not all([isinstance(group, str) for group in user_groups]):
+                raise ValueError(
+                    f"Each user group must be a string, got: {user_groups}"
+                )
+
+            return user_groups
     except Exception as e:
         logger.debug(f"Unable to fetch user groups: {e}")
 
-    return user_groups
+    return []
 
 
 def get_telemetry_id() -> Optional[Text]:
@@ -609,6 +756,11 @@ def get_telemetry_id() -> Optional[Text]:
     Returns:
         The identifier, if it is configured correctly.
     """
+    global _telemetry_id
+
+    if _telemetry_id:
+        return _telemetry_id
+
     telemetry_id = None
 
     try:
@@ -628,12 +780,21 @@ def get_telemetry_id() -> Optional[Text]:
     except Exception as e:
         logger.warning(f"Unable to retrieve telemetry ID: {e}")
 
+    # Only cache IDs which were found, so that an ID which is created later is used
+    _telemetry_id = telemetry_id
+
     return telemetry_id
 
 
+def _invalidate_telemetry_id() -> None:
+    """Make `get_telemetry_id` read the telemetry ID again on its next call."""
+    global _telemetry_id
+    _telemetry_id = None
+
+
 def _consume_telemetry_events() -> None:
     """Consume events from the telemetry events queue in a loop.
-    When an event is received, send it to Segment.
+    When events are received, send them to Segment in batches.
     """
     queue = get_events_queue()
     if not queue:
@@ -650,23 +811,75 @@ def _consume_telemetry_events() -> None:
 
     logger.debug("Started consuming telemetry events.")
 
-    while True:
+    keep_consuming = True
+    while keep_consuming:
+        events = []
         try:
-            event = queue.get()
+            keep_consuming = _collect_events(queue, events)
         except KeyboardInterrupt:
             # Handle Ctrl-C in local mode
-            break
+            keep_consuming = False
+        except (EOFError, OSError) as e:
+            logger.debug(f"Telemetry events queue is not available anymore: {e}")
+            keep_consuming = False
+
+        # Send what was collected so far, also when shutting down
+        _send_events_batch(telemetry_id, events)
+
+    logger.debug("Stopped consuming telemetry events.")
+
+
+def _collect_events(queue: "Queue", events: List[Dict[Text, Any]]) -> bool:
+    """Wait for the next event in the telemetry events queue and collect it
+    together with the events which are already queued.
+
+    There is no need to wait for further events: events which are tracked while
+    a batch is being sent are queued and form the next batch.
+
+    Args:
+        queue: The telemetry events queue.
+        events: List which the collected events are appended to.
+
+    Returns:
+        `False` if the stop marker put by `_stop_telemetry_process` was received,
+        `True` otherwise.
+    """
+    event = queue.get()
+
+    while event is not None:
+        events.append(event)
+        if len(events) >= TELEMETRY_BATCH_SIZE:
+            return True
 
         try:
-            properties = event["properties"]
-            if properties:
-                properties[TELEMETRY_ID] = telemetry_id
+            event = queue.get_nowait()
+        except queue_module.Empty:
+            return True
+
+    return False
 
-            _send_event(telemetry_id, event["name"], properties, event["context"])
-        except Exception as e:
-            logger.warning(
-                f"An error occured when trying to send the telemetry event: {e}"
-            )
+
+def _send_events_batch(telemetry_id: Text, events: List[Dict[Text, Any]]) -> None:
+    """Send a batch of events from the telemetry events queue to Segment.
+
+    Args:
+        telemetry_id: Unique telemetry ID.
+        events: Events taken from the telemetry events queue.
+    """
+    if not events:
+        return
+
+    for event in events:
+        properties = event["properties"]
+        if properties:
+            properties[TELEMETRY_ID] = telemetry_id
+
+    try:
+        _send_events(telemetry_id, events)
+    except Exception as e:
+        logger.warning(
+            f"An error occured when trying to send the telemetry events: {e}"
+        )
 
 
 def _initialize_telemetry_process() -> "Process":
@@ -676,7 +889,29 @@ def _initialize_telemetry_process() -> "Process":
         Created process (already running).
     """
 
-    return common_utils.run_in_process(_consume_telemetry_events)
+    process = common_utils.run_in_process(_consume_telemetry_events)
+    atexit.register(_stop_telemetry_process, process)
+
+    return process
+
+
+def _stop_telemetry_process(process: "Process") -> None:
+    """Let the telemetry process send the remaining events and wait for it to stop.
+
+    Args:
+        process: The process consuming the telemetry events.
+    """
+    queue = get_events_queue()
+
+    if queue and not _telemetry_queue_is_closed and process.is_alive():
+        try:
+            # `None` marks the end of the queue for the consuming process
+            queue.put(None)
+        except (AssertionError, ValueError, OSError):
+            # The queue was closed in the meantime
+            return
+
+        process.join(TELEMETRY_SHUTDOWN_TIMEOUT)
 
 
 def _disable_telemetry() -> None:
@@ -794,6 +1029,7 @@ def initialize_from_file(no_prompt: bool) -> Optional["Process"]:
         config_utils.write_global_config_value(
             constants.CONFIG_FILE_TELEMETRY_KEY, new_config
         )
+        _invalidate_telemetry_id()
 
     return (
         _initialize_telemetry_process() if telemetry_enabled else _disable_telemetry()
@@ -7,8 +7,10 @@ import os
 import random
 import re
 import string
+import threading
 import typing
 from contextlib import contextmanager
+from functools import lru_cache
 from hashlib import md5
 from http import HTTPStatus
 from types import ModuleType
@@ -60,7 +62,7 @@ logger = logging.getLogger(__name__)
 # SQL query result containing the result and the count
 class QueryResult(NamedTuple):
     result: Union[Dict, List[Dict[Text, Any]]]
-    count: int
+    count: Optional[int]
 
     def __len__(self) -> int:
         """Return query count.
@@ -443,8 +445,20 @@ def check_schema(schema_identifier: Text, data: Dict) -> bool:
         return False
 
 
+# NLU logs and responses frequently contain the same texts, so keep the hashes of
+# recently seen texts around
+@lru_cache(maxsize=16384)
 def get_text_hash(text: Union[str, bytes, None]) -> str:
     """Calculate the md5 hash of a string."""
+    return get_uncached_text_hash(text)
+
+
+def get_uncached_text_hash(text: Union[str, bytes, None]) -> str:
+    """Calculate the md5 hash of a string without caching the result.
+
+    Use this for texts which are unlikely to be hashed again, so that they don't
+    push the frequently seen texts out of the cache of `get_text_hash`.
+    """
     if text is None:
         text = b""
     elif not isinstance(text, bytes):
@@ -875,6 +889,34 @@ def run_in_loop(coro: Coroutine[Any, Any, Any]) -> Any:
         loop.close()
 
 
+# Event loops which are reused by `run_in_thread_loop` (one per thread)
+_thread_local_loops = threading.local()
+
+
+def run_in_thread_loop(coro: Coroutine[Any, Any, Any]) -> Any:
+    """Runs a function in an event loop which is reused for the current thread.
+
+    In contrast to `run_in_loop` the event loop is not closed after running the
+    coroutine. Use this for code paths which frequently have to run coroutines from
+    synchronous code (e.g. the event consumers), to avoid the overhead of creating
+    a new event loop every time.
+
+    Args:
+        coro: A coroutine to run in a event loop.
+
+    Returns:
+        The result of that function.
+    """
+    loop = getattr(_thread_local_loops, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        _thread_local_loops.loop = loop
+
+    asyncio.set_event_loop(loop)
+
+    return loop.run_until_complete(coro)
+
+
 def get_uptime() -> float:
     """Return the process uptime in seconds.
 
@@ -1,18 +1,22 @@
-import glob
-import errno
-import json
 import os
 import logging
 import tarfile
 import tempfile
 from pathlib import Path
-from typing import Any, List, Text, Union, Optional
+from typing import Any, Iterator, List, Text, Tuple, Union, Optional
+import ujson
 from sanic.request import File
 
 import rasax.community.config as rasa_x_config
 
 logger = logging.getLogger(__name__)
 DEFAULT_ENCODING = "utf-8"
+# Size of the buffers used when unpacking archives
+TAR_BUFFER_SIZE = 1024 * 1024  # Bytes
+
+# Last value of the shared project directory and the `Path` created for it. The
+# value is compared on every access as other processes might change it.
+_project_directory_cache: Tuple[Optional[bytes], Path] = (None, Path())
 
 
 def set_project_directory(directory: Union[Path, Text]) -> None:
@@ -25,10 +29,21 @@ def set_project_directory(directory: Union[Path, Text]) -> None:
 def get_project_directory() -> Path:
     """Returns the path to the current project directory."""
 
-    if not rasa_x_config.PROJECT_DIRECTORY.value:
-        return Path()
+    global _project_directory_cache
+
+    raw_directory = rasa_x_config.PROJECT_DIRECTORY.value
+    cached_raw_directory, cached_directory = _project_directory_cache
+    if raw_directory == cached_raw_directory:
+        return cached_directory
+
+    if not raw_directory:
+        directory = Path()
     else:
-        return Path(rasa_x_config.PROJECT_DIRECTORY.value.decode(DEFAULT_ENCODING))
+        directory = Path(raw_directory.decode(DEFAULT_ENCODING))
+
+    _project_directory_cache = (raw_directory, directory)
+
+    return directory
 
 
 def create_directory(directory_path: Text) -> None:
@@ -36,12 +51,7 @@ def create_directory(directory_path: Text) -> None:
 
     Succeeds even if the path already exists."""
 
-    try:
-        os.makedirs(directory_path)
-    except OSError as e:
-        # be happy if someone already created the path
-        if e.errno != errno.EEXIST:
-            raise
+    os.makedirs(directory_path, exist_ok=True)
 
 
 def _filename_without_prefix(file: Text) -> Text:
@@ -49,38 +59,89 @@ def _filename_without_prefix(file: Text) -> Text:
     return "_".join(file.split("_")[1:])
 
 
-def list_directory(path: Text) -> List[Text]:
-    """Returns all files and folders excluding hidden files.
+def _scan_directory(path: Text) -> Iterator[os.DirEntry]:
+    """Recursively yields all files and folders excluding hidden files.
 
-    If the path points to a file, returns the file. This is a recursive
-    implementation returning files in any depth of the path."""
+    Files are yielded before the folders of the same directory, and the content of
+    sub folders is yielded after that. The type information of the returned
+    `os.DirEntry` objects is cached, so checking it doesn't require extra
+    system calls in most cases.
+
+    Args:
+        path: Path of the directory to scan.
+
+    Returns:
+        Entries of the files and folders.
+    """
+
+    try:
+        with os.scandir(path) as iterator:
+            entries = list(iterator)
+    except OSError:
+        # skip directories which can't be read (same as `os.walk`)
+        return
+
+    files = []
+    directories = []
+    for entry in entries:
+        try:
+            is_directory = entry.is_dir()
+        except OSError:
+            is_directory = False
+
+        if is_directory:
+            directories.append(entry)
+        else:
+            files.append(entry)
+
+    # sort files for same order across runs
+    files.sort(key=lambda entry: _filename_without_prefix(entry.name))
+    # add not hidden files and directories
+    yield from (entry for entry in files if not entry.name.startswith("."))
+    yield from (entry for entry in directories if not entry.name.startswith("."))
+
+    for directory in directories:
+        yield from _scan_directory(directory.path)
+
+
+def iter_directory(path: Text) -> Iterator[Text]:
+    """Yields all files and folders excluding hidden files.
+
+    Same as `list_directory`, but the paths are yielded while the directory is
+    scanned instead of being collected in a list first."""
 
     if os.path.isfile(path):
-        return [path]
+        yield path
     elif os.path.isdir(path):
-        results = []
-        for base, dirs, files in os.walk(path, followlinks=True):
-            # sort files for same order across runs
-            files = sorted(files, key=_filename_without_prefix)
-            # add not hidden files
-            good_files = filter(lambda x: not x.startswith("."), files)
-            results.extend(os.path.join(base, f) for f in good_files)
-            # add not hidden directories
-            good_directories = filter(lambda x: not x.startswith("."), dirs)
-            results.extend(os.path.join(base, f) for f in good_directories)
-        return results
+        yield from (entry.path for entry in _scan_directory(path))
     else:
         raise ValueError(
             "Could not locate the resource '{}'.".format(os.path.abspath(path))
         )
 
 
+def list_directory(path: Text) -> List[Text]:
+    """Returns all files and folders excluding hidden files.
+
+    If the path points to a file, returns the file. This is a recursive
+    implementation returning files in any depth of the path."""
+
+    return list(iter_directory(path))
+
+
 def list_files(path: Text) -> List[Text]:
     """Returns all files excluding hidden files.
 
     If the path points to a file, returns the file."""
 
-    return [fn for fn in list_directory(path) if os.path.isfile(fn)]
+    if os.path.isfile(path):
+        return [path]
+    elif os.path.isdir(path):
+        return [entry.path for entry in _scan_directory(path) if entry.is_file()]
+    else:
+        raise ValueError(
+            "Could not locate the resource '{}'.".format(os.path.abspath(path))
+        )
 
 
 def list_subdirectories(path: Text) -> List[Text]:
@@ -88,7 +149,15 @@ def list_subdirectories(path: Text) -> List[Text]:
 
     If the path points to a file, returns an empty list."""
 
-    return [fn for fn in glob.glob(os.path.join(path, "*")) if os.path.isdir(fn)]
+    try:
+        with os.scandir(path) as iterator:
+            return [
+                entry.path
+                for entry in iterator
+                if not entry.name.startswith(".") and entry.is_dir()
+            ]
+    except OSError:
+        return []
 
 
 def should_dump() -> bool:
@@ -100,8 +169,7 @@ def create_path(file_path: Text) -> None:
     """Makes sure all directories in the 'file_path' exists."""
 
     parent_dir = os.path.dirname(os.path.abspath(file_path))
-    if not os.path.exists(parent_dir):
-        os.makedirs(parent_dir)
+    os.makedirs(parent_dir, exist_ok=True)
 
 
 def create_temporary_file(data: Any, suffix: Text = "", mode: Text = "w+") -> Text:
@@ -158,6 +226,9 @@ def read_file_as_bytes(path: str) -> bytes:
 def convert_bytes_to_string(data: Union[bytes, bytearray, Text]) -> Text:
     """Convert `data` to string if it is a bytes-like object."""
 
+    if type(data) is str:
+        return data
+
     if isinstance(data, (bytes, bytearray)):
         return data.decode(DEFAULT_ENCODING)
 
@@ -168,7 +239,7 @@ def read_json_file(filename: Union[Text, Path]) -> Any:
     """Read json from a file."""
     content = read_file(filename)
     try:
-        return json.loads(content)
+        return ujson.loads(content)
     except ValueError as e:
         raise ValueError(
             "Failed to read json from '{}'. Error: "
@@ -204,7 +275,12 @@ def unpack_file(
 
     # All files are in a subdirectory.
     try:
-        with tarfile.open(model_file, mode="r:gz") as tar:
+        # Read the archive as a stream so that it is decompressed only once, instead
+        # of seeking back to the start of the compressed file after reading the
+        # list of members
+        with tarfile.open(model_file, mode="r|gz", bufsize=TAR_BUFFER_SIZE) as tar:
+            # only used by Python 3.8+, older versions use a fixed buffer size
+            tar.copybufsize = TAR_BUFFER_SIZE
             tar.extractall(working_directory)
             logger.debug(f"Extracted model to '{working_directory}'.")
     except Exception as e:
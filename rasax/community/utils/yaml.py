@@ -1,6 +1,7 @@
 import re
 import os
 import io
+import threading
 from pathlib import Path
 from typing import Any, Dict, List, Text, TextIO, Union, Optional
 from collections import OrderedDict
@@ -11,15 +12,47 @@ from ruamel.yaml.comments import CommentedMap
 import rasax.community.utils.io as io_utils
 
 YAML_VERSION = (1, 2)
+# eg. ${USER_NAME}, ${PASSWORD}
+ENV_VAR_PATTERN = re.compile(r"^(.*)\$\{(.*)\}(.*)$")
 
+# `YAML` instances are reused since creating them is expensive. They keep state
+# while loading / dumping, so each thread gets its own instances.
+_thread_local_yaml = threading.local()
+# Whether the custom constructors and resolvers were registered already
+_is_yaml_loading_configured = False
 
-def _dump_yaml(obj: Dict, output: Union[Text, Path, io.StringIO]) -> None:
-    yaml_writer = yaml.YAML(pure=True, typ="safe")
-    yaml_writer.unicode_supplementary = True
-    yaml_writer.default_flow_style = False
-    yaml_writer.version = YAML_VERSION
 
-    yaml_writer.dump(obj, output)
+def _get_yaml_writer() -> yaml.YAML:
+    yaml_writer = getattr(_thread_local_yaml, "writer", None)
+    if yaml_writer is None:
+        yaml_writer = yaml.YAML(pure=True, typ="safe")
+        yaml_writer.unicode_supplementary = True
+        yaml_writer.default_flow_style = False
+        yaml_writer.version = YAML_VERSION
+        _thread_local_yaml.writer = yaml_writer
+
+    return yaml_writer
+
+
+def _get_yaml_parser() -> yaml.YAML:
+    global _is_yaml_loading_configured
+
+    if not _is_yaml_loading_configured:
+        _fix_yaml_loader()
+        _replace_yaml_environment_variables()
+        _is_yaml_loading_configured = True
+
+    yaml_parser = getattr(_thread_local_yaml, "parser", None)
+    if yaml_parser is None:
+        yaml_parser = yaml.YAML(typ="safe")
+        yaml_parser.version = YAML_VERSION
+        _thread_local_yaml.parser = yaml_parser
+
+    return yaml_parser
+
+
+def _dump_yaml(obj: Dict, output: Union[Text, Path, io.StringIO]) -> None:
+    _get_yaml_writer().dump(obj, output)
 
 
 def _fix_yaml_loader() -> None:
@@ -37,13 +70,15 @@ def _fix_yaml_loader() -> None:
 def _replace_yaml_environment_variables() -> None:
     """Enable yaml loader to process the environment variables in the yaml."""
 
-    # eg. ${USER_NAME}, ${PASSWORD}
-    env_var_pattern = re.compile(r"^(.*)\$\{(.*)\}(.*)$")
-    yaml.add_implicit_resolver("!env_var", env_var_pattern)
+    yaml.add_implicit_resolver("!env_var", ENV_VAR_PATTERN)
 
     def env_var_constructor(loader, node):
         """Process environment variables found in the YAML."""
         value = loader.construct_scalar(node)
+        if "$" not in value:
+            # nothing to expand (e.g. an explicit `!env_var` tag on a plain value)
+            return value
+
         expanded_vars = os.path.expandvars(value)
         if "$" in expanded_vars:
             not_expanded = [w for w in expanded_vars.split() if "$" in w]
@@ -58,44 +93,30 @@ def _replace_yaml_environment_variables() -> None:
 
 
 def _is_ascii(text: Text) -> bool:
-    return all(ord(character) < 128 for character in text)
+    # `str.isascii` is only available from Python 3.7 on
+    try:
+        text.encode("ascii")
+    except UnicodeEncodeError:
+        return False
 
+    return True
 
-def _enable_ordered_dict_yaml_dumping() -> None:
-    """Ensure that `OrderedDict`s are dumped so that the order of keys is respected."""
 
-    def _order_rep(dumper: yaml.Representer, _data: Dict[Any, Any]) -> Any:
-        return dumper.represent_mapping(
-            "tag:yaml.org,2002:map", _data.items(), flow_style=False
-        )
+def _represent_mapping_in_order(dumper: yaml.Representer, _data: Dict[Any, Any]) -> Any:
+    return dumper.represent_mapping(
+        "tag:yaml.org,2002:map", _data.items(), flow_style=False
+    )
 
-    yaml.add_representer(OrderedDict, _order_rep)
 
+class _KeyOrderPreservingDumper(yaml.Dumper):
+    """Dumper which writes the keys of mappings in their insertion order instead of
+    sorting them."""
 
-def _convert_to_ordered_dict(obj: Any) -> Any:
-    """Convert object to an `OrderedDict`.
 
-    Args:
-        obj: Object to convert.
-
-    Returns:
-        An `OrderedDict` with all nested dictionaries converted if `obj` is a
-        dictionary, otherwise the object itself.
-    """
-    # use recursion on lists
-    if isinstance(obj, list):
-        return [_convert_to_ordered_dict(element) for element in obj]
-
-    if isinstance(obj, dict):
-        out = OrderedDict()
-        # use recursion on dictionaries
-        for k, v in obj.items():
-            out[k] = _convert_to_ordered_dict(v)
-
-        return out
-
-    # return all other objects
-    return obj
+# Exact types are looked up first, the multi representer covers any subclasses
+_KeyOrderPreservingDumper.add_representer(dict, _represent_mapping_in_order)
+_KeyOrderPreservingDumper.add_representer(OrderedDict, _represent_mapping_in_order)
+_KeyOrderPreservingDumper.add_multi_representer(dict, _represent_mapping_in_order)
 
 
 def load_yaml(content: Union[str, TextIO]) -> Any:
@@ -109,15 +130,11 @@ def read_yaml(content: Text) -> Union[List[Any], Dict[Text, Any]]:
      Args:
         content: A text containing yaml content.
     """
-    _fix_yaml_loader()
-
-    _replace_yaml_environment_variables()
-
-    yaml_parser = yaml.YAML(typ="safe")
-    yaml_parser.version = YAML_VERSION
+    yaml_parser = _get_yaml_parser()
 
-    if _is_ascii(content):
-        # Required to make sure emojis are correctly parsed
+    if ("\\u" in content or "\\U" in content) and _is_ascii(content):
+        # Required to make sure emojis are correctly parsed. Only escape sequences
+        # are changed by this, so content without them can be skipped.
         content = (
             content.encode("utf-8")
             .decode("raw_unicode_escape")
@@ -147,12 +164,12 @@ def write_yaml_file(
         filename: The path to the file which should be written.
         should_preserve_key_order: Whether to preserve key order in `data`.
     """
-    if should_preserve_key_order:
-        _enable_ordered_dict_yaml_dumping()
-        data = _convert_to_ordered_dict(data)
+    dumper = _KeyOrderPreservingDumper if should_preserve_key_order else yaml.Dumper
 
     with Path(filename).open("w", encoding=io_utils.DEFAULT_ENCODING) as outfile:
-        yaml.dump(data, outfile, default_flow_style=False, allow_unicode=True)
+        yaml.dump(
+            data, outfile, Dumper=dumper, default_flow_style=False, allow_unicode=True
+        )
 
 
 def dump_yaml(content: Any) -> Optional[str]:
@@ -180,6 +197,8 @@ def dump_obj_as_yaml_to_string(obj: Dict) -> Text:
 # uses round_trip_dump() which preserves key order and doesn't print yaml markers
 def dump_yaml_to_file(filename: Union[Text, Path], content: Any) -> None:
     """Dump content to yaml."""
+    # Create the whole yaml string before opening the file, so that the file is left
+    # untouched if dumping fails
     io_utils.write_file(filename, dump_yaml(content))
 
 
@@ -203,10 +222,9 @@ def extract_partial_endpoint_config(
     content = io_utils.read_file(endpoint_config_path)
     endpoint_dict = {key: load_yaml(content)[key]}
 
-    # dump this sub-dictionary to a temporary file and load endpoint config from it
-    temp_path = dump_as_yaml_to_temporary_file(endpoint_dict)
-
-    yaml_content = read_yaml_file(temp_path)
+    # dump this sub-dictionary and load endpoint config from it, so that environment
+    # variables are only expanded in this section
+    yaml_content = read_yaml(dump_yaml(endpoint_dict))
     if type(yaml_content) is dict and key in yaml_content:
         return yaml_content[key]
 